@@ -0,0 +1,171 @@
+// Clientside callbacks for the Programme Builder (layouts/dashboard.py)
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    policy_builder: {
+        // mirrors components/spend_type_div.py
+        spend_type_div: function (category, percentage, cost) {
+            return {
+                type: "Div",
+                namespace: "dash_html_components",
+                props: {
+                    children: [
+                        {
+                            type: "Text",
+                            namespace: "dash_mantine_components",
+                            props: { children: category + ":", weight: 450 },
+                        },
+                        {
+                            type: "Text",
+                            namespace: "dash_mantine_components",
+                            props: { children: percentage + "%", weight: 600 },
+                        },
+                        {
+                            type: "Text",
+                            namespace: "dash_mantine_components",
+                            props: { children: "(€" + cost + "mn)", weight: 450, size: "xs" },
+                        },
+                    ],
+                    style: {
+                        display: "flex",
+                        "align-items": "center",
+                        gap: "5px",
+                        "margin-right": "30px",
+                    },
+                },
+            };
+        },
+
+        // smallest edit distance between word and any prefix of token
+        prefix_distance: function (word, token) {
+            let previous = Array.from({ length: token.length + 1 }, (_, j) => j);
+            for (let i = 1; i <= word.length; i++) {
+                const current = [i];
+                for (let j = 1; j <= token.length; j++) {
+                    const substitution = previous[j - 1] + (word[i - 1] === token[j - 1] ? 0 : 1);
+                    current.push(Math.min(previous[j] + 1, current[j - 1] + 1, substitution));
+                }
+                previous = current;
+            }
+            return Math.min(...previous);
+        },
+
+        // catalog rows with a token starting with word, or one typo away from it
+        search_rows: function (word, index) {
+            const tokens = index.tokens;
+            const rows = new Set();
+
+            // tokens are sorted, so the ones starting with word are contiguous
+            let lo = 0;
+            let hi = tokens.length;
+            while (lo < hi) {
+                const mid = (lo + hi) >> 1;
+                if (tokens[mid] < word) {
+                    lo = mid + 1;
+                } else {
+                    hi = mid;
+                }
+            }
+            for (let t = lo; t < tokens.length && tokens[t].startsWith(word); t++) {
+                index.rows[t].forEach((row) => rows.add(row));
+            }
+
+            if (word.length >= 4) {
+                const prefixDistance = window.dash_clientside.policy_builder.prefix_distance;
+                tokens.forEach((token, t) => {
+                    if (
+                        token.length >= word.length - 1 &&
+                        prefixDistance(word, token.slice(0, word.length + 1)) <= 1
+                    ) {
+                        index.rows[t].forEach((row) => rows.add(row));
+                    }
+                });
+            }
+            return rows;
+        },
+
+        // hides the rows of the policies not matching every word of the search in their
+        // name or lens labels (index built by PolicyCatalog.search_index)
+        search_policies: function (search, catalog, ids) {
+            const query = (search || "").toLowerCase();
+            const words = query.match(/[a-z0-9]+/g);
+            if (!catalog || !words) {
+                return ids.map(() => false);
+            }
+
+            const searchRows = window.dash_clientside.policy_builder.search_rows;
+            let matched = null;
+            for (const word of words) {
+                const rows = searchRows(word, catalog.search);
+                matched = matched === null ? rows : new Set([...matched].filter((row) => rows.has(row)));
+            }
+
+            const rows = new Map(catalog.ids.map((id, row) => [id, row]));
+            const idQuery = query.trim().replace(/ /g, "-");
+            return ids.map((id) => !(matched.has(rows.get(id.index)) || id.index.includes(idQuery)));
+        },
+
+        // the options list holds every lens grouping, the class picks one (assets/style.css)
+        lens_class: function (lens) {
+            return "policy-options " + lens;
+        },
+
+        // the fullscreen modal reuses the treemap already drawn in budget-graph
+        fullscreen_figure: function (opened, figure) {
+            if (!opened) {
+                return window.dash_clientside.no_update;
+            }
+            return figure;
+        },
+
+        // signature of the catalog the package was costed against, when the
+        // browser holds an older one
+        catalog_refresh: function (packageState, catalog) {
+            if (!packageState || !catalog || packageState.catalog_signature === catalog.signature) {
+                return window.dash_clientside.no_update;
+            }
+            return packageState.catalog_signature;
+        },
+
+        // total package cost and split by lens category of the checked policies
+        update_totals: function (checked, ids, options, lens, catalog) {
+            if (!catalog || !checked.includes(true)) {
+                return ["-", []];
+            }
+
+            const spendTypeDiv = window.dash_clientside.policy_builder.spend_type_div;
+            const rows = new Map(catalog.ids.map((id, row) => [id, row]));
+            const lensData = catalog.lenses[lens];
+            const categoryCosts = new Array(lensData.categories.length).fill(0);
+            const categoryCounts = new Array(lensData.categories.length).fill(0);
+            let total = 0;
+
+            for (let i = 0; i < checked.length; i++) {
+                if (!checked[i]) {
+                    continue;
+                }
+                const row = rows.get(ids[i].index);
+                if (row === undefined) {
+                    continue;
+                }
+                const level = catalog.levels.indexOf(options[i] || "medium");
+                const cost = level >= 0 ? catalog.costs[level][row] || 0 : 0;
+                total += cost;
+
+                const code = lensData.codes[row];
+                if (code >= 0) {
+                    categoryCosts[code] += cost;
+                    categoryCounts[code] += 1;
+                }
+            }
+
+            const split = lensData.categories.map((category, code) => {
+                if (categoryCounts[code] === 0) {
+                    return spendTypeDiv(category, 0, 0);
+                }
+                const percentage = total > 0 ? Math.round((categoryCosts[code] / total) * 100) : 0;
+                return spendTypeDiv(category, percentage, categoryCosts[code].toFixed(1));
+            });
+
+            return ["€" + total.toFixed(1) + "mn", split];
+        },
+    },
+});
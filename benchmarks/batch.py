@@ -0,0 +1,59 @@
+"""
+    Benchmarks costing batches of encoded packages.
+
+Times layouts.functions.batch.evaluate_packages on random packages of random
+catalogs. Run from the repo root with:
+
+    python -m benchmarks.batch
+"""
+import timeit
+
+import numpy as np
+
+from benchmarks.solver import make_catalog
+from layouts.functions.batch import evaluate_packages
+from layouts.functions.catalog import OPTION_LEVELS
+from layouts.functions.package_encoding import encode_package
+
+SIZES = [100, 500]
+BATCHES = [1_000, 100_000]
+# distinct packages, repeated to fill the batches
+N_PACKAGES = 1_000
+REPEATS = 3
+
+
+def random_packages(catalog, n_packages, seed=0):
+    rng = np.random.default_rng(seed)
+    packages = []
+    for _ in range(n_packages):
+        rows = np.flatnonzero(rng.random(len(catalog)) < 0.3)
+        options = rng.choice(OPTION_LEVELS, size=len(rows)).tolist()
+        packages.append(encode_package(catalog, catalog.ids[rows].tolist(), options))
+
+    return packages
+
+
+def main():
+    print(f"{'rows':>6} " + " ".join(f"{f'{n:,} packages (s)':>20}" for n in BATCHES))
+    for n_rows in SIZES:
+        catalog = make_catalog(n_rows)
+        packages = random_packages(catalog, N_PACKAGES)
+
+        timings = [
+            min(
+                timeit.repeat(
+                    lambda: evaluate_packages(
+                        catalog, packages * (n_packages // N_PACKAGES)
+                    ),
+                    number=1,
+                    repeat=REPEATS,
+                )
+            )
+            for n_packages in BATCHES
+        ]
+
+        print(f"{n_rows:>6} " + " ".join(f"{t:>20.2f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
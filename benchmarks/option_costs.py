@@ -0,0 +1,68 @@
+"""
+    Benchmarks resolving the cost of each policy's chosen option.
+
+Compares the row-wise lookups the dashboard and checkout used to do with the
+vectorized PolicyCatalog.option_costs. Run from the repo root with:
+
+    python -m benchmarks.option_costs
+"""
+import timeit
+
+import numpy as np
+
+from benchmarks.solver import make_catalog
+from layouts.functions.catalog import OPTION_LEVELS
+
+SIZES = [100, 1_000, 10_000]
+REPEATS = 5
+
+
+def make_selection(n_rows, seed=0):
+    catalog = make_catalog(n_rows, seed)
+    rows = np.arange(n_rows)
+    options = np.random.default_rng(seed).choice(OPTION_LEVELS, size=n_rows).tolist()
+
+    return catalog, rows, options
+
+
+def apply_lookup(df):
+    return df.apply(lambda row: row[row["option"]], axis=1)
+
+
+def records_lookup(df):
+    cost = []
+    for row in df.to_dict("records"):
+        cost.append(row[row["option"]])
+
+    return cost
+
+
+def best_of(func, n_rows):
+    number = max(1, 2_000 // n_rows)
+    timings = timeit.repeat(func, number=number, repeat=REPEATS)
+    return min(timings) / number
+
+
+def main():
+    print(
+        f"{'rows':>8} {'apply (ms)':>12} {'records (ms)':>14} {'vectorized (ms)':>17} {'speedup':>9}"
+    )
+    for n_rows in SIZES:
+        catalog, rows, options = make_selection(n_rows)
+        df = catalog.selection(rows, options)
+        assert np.allclose(
+            apply_lookup(df), catalog.option_costs(rows, options), equal_nan=True
+        )
+
+        apply_time = best_of(lambda: apply_lookup(df), n_rows)
+        records_time = best_of(lambda: records_lookup(df), n_rows)
+        vectorized_time = best_of(lambda: catalog.option_costs(rows, options), n_rows)
+
+        print(
+            f"{n_rows:>8} {apply_time * 1e3:>12.3f} {records_time * 1e3:>14.3f} "
+            f"{vectorized_time * 1e3:>17.3f} {apply_time / vectorized_time:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
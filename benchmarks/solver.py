@@ -0,0 +1,68 @@
+"""
+    Benchmarks suggesting a package for a budget.
+
+Times layouts.functions.solver.suggest_package on random catalogs, with and
+without minimum shares. Run from the repo root with:
+
+    python -m benchmarks.solver
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from layouts.functions.catalog import OPTION_LEVELS, PolicyCatalog, compact_catalog
+from layouts.functions.solver import suggest_package
+from layouts.functions.utils import lens_1_categories, lens_2_categories
+
+SIZES = [100, 500, 2_000]
+REPEATS = 5
+MIN_SHARES = {"EOP": 0.15, "TEC": 0.1}
+
+
+def make_catalog(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    medium = rng.uniform(5, 100, size=n_rows).round(2)
+    df = pd.DataFrame(
+        {
+            "policy_options": [f"Policy option {i}" for i in range(n_rows)],
+            "lens_1": rng.choice(lens_1_categories, size=n_rows),
+            "lens_2": rng.choice(lens_2_categories, size=n_rows),
+            "flag": rng.choice(["scalable", "fixed", "awaiting"], size=n_rows),
+            "default": rng.random(n_rows) < 0.02,
+            "on_off": False,
+        }
+    )
+    for level, scale in zip(OPTION_LEVELS, [0.4, 0.7, 1, 1.4]):
+        df[level] = (medium * scale).round(2)
+    df["cost"] = df["medium"]
+    df["id"] = [f"policy-option-{i}" for i in range(n_rows)]
+
+    return PolicyCatalog(compact_catalog(df))
+
+
+def main():
+    print(f"{'rows':>6} {'budget':>8} {'no shares (ms)':>15} {'shares (ms)':>12}")
+    for n_rows in SIZES:
+        catalog = make_catalog(n_rows)
+        budget = round(float(np.nansum(catalog.costs[:, 2])) / 3)
+
+        timings = []
+        for min_shares in [None, MIN_SHARES]:
+            timings.append(
+                min(
+                    timeit.repeat(
+                        lambda: suggest_package(catalog, budget, min_shares=min_shares),
+                        number=1,
+                        repeat=REPEATS,
+                    )
+                )
+            )
+
+        print(
+            f"{n_rows:>6} {budget:>8} {timings[0] * 1e3:>15.1f} {timings[1] * 1e3:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+    Benchmarks building the dashboard and checkout treemaps.
+
+Compares the plotly express get_treemap with the dict based get_treemap_dict,
+including the JSON serialisation Dash does before sending the figure. Run from
+the repo root with:
+
+    python -m benchmarks.treemap
+"""
+import json
+import timeit
+
+import numpy as np
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+import components  # registers the 10ds plotly template
+from layouts.functions.graph import get_treemap, get_treemap_dict
+from layouts.functions.utils import lens_1_categories
+
+SIZES = [50, 500, 5_000]
+REPEATS = 5
+
+TREEMAPS = {
+    "dashboard": dict(path=["type", "policy_options"]),
+    "checkout": dict(path=["type", "lens_1", "policy_options"], length=15),
+}
+
+
+def make_policies(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "policy_options": [
+                f"Policy option {i} for a fairly long programme name"
+                for i in range(n_rows)
+            ],
+            "lens_1": rng.choice(lens_1_categories, size=n_rows),
+            "flag": rng.choice(["scalable", "fixed"], size=n_rows),
+            "option": rng.choice(["low", "medium", "high"], size=n_rows),
+            "cost": rng.uniform(1, 100, size=n_rows),
+        }
+    )
+    df["type"] = f"Total (€{round(df['cost'].sum(), 1)}mn)"
+
+    return df
+
+
+def build_and_serialise(builder, df, kwargs):
+    return json.dumps(builder(df.copy(), **kwargs), cls=PlotlyJSONEncoder)
+
+
+def best_of(builder, df, kwargs):
+    number = max(1, 500 // len(df))
+    timings = timeit.repeat(
+        lambda: build_and_serialise(builder, df, kwargs), number=number, repeat=REPEATS
+    )
+    return min(timings) / number
+
+
+def main():
+    print(
+        f"{'treemap':>10} {'rows':>6} {'px (ms)':>10} {'dict (ms)':>11} {'speedup':>9}"
+    )
+    for name, kwargs in TREEMAPS.items():
+        for n_rows in SIZES:
+            df = make_policies(n_rows)
+            px_time = best_of(get_treemap, df, kwargs)
+            dict_time = best_of(get_treemap_dict, df, kwargs)
+
+            print(
+                f"{name:>10} {n_rows:>6} {px_time * 1e3:>10.2f} "
+                f"{dict_time * 1e3:>11.2f} {px_time / dict_time:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+    Benchmarks the simulated cost range of a package.
+
+Times layouts.functions.uncertainty.package_cost_percentiles on random
+packages of every costed policy, for a few numbers of draws. Run from the
+repo root with:
+
+    python -m benchmarks.uncertainty
+"""
+import timeit
+
+import numpy as np
+
+from benchmarks.solver import make_catalog
+from layouts.functions.uncertainty import package_cost_percentiles
+
+SIZES = [100, 500, 2_000]
+DRAWS = [1_000, 10_000]
+REPEATS = 5
+
+
+def main():
+    print(f"{'rows':>6} " + " ".join(f"{f'{n:,} draws (ms)':>17}" for n in DRAWS))
+    for n_rows in SIZES:
+        catalog = make_catalog(n_rows)
+        rows = np.flatnonzero(catalog.df["flag"].to_numpy() != "awaiting")
+        options = ["medium"] * len(rows)
+
+        timings = [
+            min(
+                timeit.repeat(
+                    lambda: package_cost_percentiles(
+                        catalog, rows, options, n_draws=n_draws
+                    ),
+                    number=1,
+                    repeat=REPEATS,
+                )
+            )
+            for n_draws in DRAWS
+        ]
+
+        print(f"{n_rows:>6} " + " ".join(f"{t * 1e3:>17.1f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
+import copy
+import json
 import math
+import threading
+
+import numpy as np
 from dash import html, dcc
 import dash_mantine_components as dmc
+from plotly.utils import PlotlyJSONEncoder
 
 
 def policy_option(row_dict, scalable_value="medium"):
@@ -8,12 +14,8 @@ def policy_option(row_dict, scalable_value="medium"):
     label = row_dict["policy_options"]
     on_or_off = row_dict["on_off"]
 
-    if row_dict["flag"] == "awaiting":
-        disabled = True
-        color = "#d3d3d3"
-    else:
-        disabled = False
-        color = ""
+    # awaiting policies are greyed out (assets/style.css)
+    disabled = row_dict["flag"] == "awaiting"
 
     if row_dict["flag"] == "scalable":
         options = []
@@ -47,55 +49,174 @@ def policy_option(row_dict, scalable_value="medium"):
             id={"type": "cost-dropdown", "index": f"{id}"},
         )
 
+    # layout is in assets/style.css rather than inline, it's sent for every policy
     return html.Div(
         [
-            dmc.Divider(style={"margin": "6px 0"}),
             html.Div(
                 [
-                    html.Div(
-                        [
-                            dmc.Checkbox(
-                                id={"type": "policy-option", "index": f"{id}"},
-                                checked=on_or_off,
-                                size="md",
-                                disabled=disabled,
-                            ),
-                            dmc.Text(label, size="md", weight=450),
-                        ],
-                        style={
-                            "display": "flex",
-                            "gap": "1rem",
-                            "align-items": "center",
-                            "color": color,
-                            "width": "60%",
-                        },
+                    dmc.Checkbox(
+                        id={"type": "policy-option", "index": f"{id}"},
+                        checked=on_or_off,
+                        size="md",
+                        disabled=disabled,
                     ),
-                    html.Div(cost, style={"width": "40%"}),
+                    dmc.Text(label, size="md", weight=450),
                 ],
-                style={
-                    "display": "flex",
-                    "gap": "2rem",
-                    "align-items": "center",
-                },
+                className="policy-option-label awaiting"
+                if disabled
+                else "policy-option-label",
             ),
+            html.Div(cost, className="policy-option-cost"),
         ],
         id={"type": "policy-option-div", "index": f"{id}"},
+        className="policy-option",
     )
 
 
-def policy_categories(category, categories_df):
+def lens_layout(orders):
+    """
+        className and style placing a row of the policy options list in the
+    lenses it belongs to.
+
+    Parameters
+    ----------
+    orders: dict
+        Position of the row in the list of each lens it is shown in.
+    """
+    return {
+        "className": " ".join(["policy-row"] + [f"in-{lens}" for lens in orders]),
+        "style": {f"--{lens}-order": str(order) for lens, order in orders.items()},
+    }
+
+
+def policy_category_title(category, lens, order):
     return html.Div(
-        [
-            dmc.Title(
-                category.upper(),
-                order=4,
-                color="gray",
-                style={"width": "100%", "text-align": "center"},
-            ),
-        ]
-        + [
-            policy_option(row_dict, scalable_value=row_dict["option"])
-            for row_dict in categories_df.to_dict("records")
-        ],
-        style={"margin-bottom": "15px"},
+        dmc.Title(
+            category.upper(),
+            order=4,
+            color="gray",
+            style={"width": "100%", "text-align": "center", "margin-top": "15px"},
+        ),
+        **lens_layout({lens: order}),
     )
+
+
+def _to_json(component):
+    """Serialised component tree, as Dash sends it to the browser"""
+    return json.loads(json.dumps(component, cls=PlotlyJSONEncoder))
+
+
+def _set_prop(tree, component_type, prop, value):
+    """Sets a prop of the component in tree whose pattern-matching id has the given type"""
+    props = tree.get("props", {})
+    component_id = props.get("id")
+    if isinstance(component_id, dict) and component_id.get("type") == component_type:
+        props[prop] = value
+        return
+
+    children = props.get("children")
+    if isinstance(children, dict):
+        _set_prop(children, component_type, prop, value)
+    elif isinstance(children, list):
+        for child in children:
+            if isinstance(child, dict):
+                _set_prop(child, component_type, prop, value)
+
+
+class PolicyOptionsCache:
+    """
+        Serialised policy options list in its default state, built once per
+    catalog.
+
+    Every policy is rendered once, with its position under each lens as a
+    CSS variable, so switching lens only changes the container's className
+    (see assets/style.css). A package only differs from the defaults in a few
+    checkboxes and cost dropdowns, so those policies are copied and overridden
+    while every other policy reuses its cached tree.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._titles = []
+        self._policies = []
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._key = None
+            self._titles, self._policies = [], []
+
+    def _build(self, catalog, lens_categories):
+        titles = []
+        orders = [{} for _ in range(len(catalog))]
+        for lens, categories in lens_categories.items():
+            lens_column = catalog.df[lens].to_numpy()
+            order = 0
+            for category in categories:
+                titles.append(_to_json(policy_category_title(category, lens, order)))
+                order += 1
+                for row in np.flatnonzero(lens_column == category):
+                    orders[row][lens] = order
+                    order += 1
+
+        records = catalog.selection(np.arange(len(catalog)), ["medium"] * len(catalog))
+        records["on_off"] = catalog.default
+        policies = [
+            _to_json(
+                html.Div(
+                    policy_option(row_dict),
+                    id={"type": "policy-row", "index": f"{row_dict['id']}"},
+                    **lens_layout(row_orders),
+                )
+            )
+            for row_dict, row_orders in zip(records.to_dict("records"), orders)
+        ]
+
+        return titles, policies
+
+    def children(self, catalog, lens_categories, checked=None, options=None):
+        """
+            Contents of the policy-options-container for a package.
+
+        Parameters
+        ----------
+        catalog: PolicyCatalog
+            Catalog the policies are listed from.
+        lens_categories: dict
+            Categories of each lens, in display order, e.g.
+            {"lens_1": lens_1_categories, "lens_2": lens_2_categories}.
+        checked: np.ndarray of bool, optional
+            Checked state of every catalog row, the catalog defaults if omitted.
+        options: np.ndarray of str, optional
+            Chosen cost level of every catalog row, medium if omitted.
+        """
+        key = (
+            catalog.signature,
+            tuple(
+                (lens, tuple(categories))
+                for lens, categories in lens_categories.items()
+            ),
+        )
+        with self._lock:
+            if key != self._key:
+                self._titles, self._policies = self._build(catalog, lens_categories)
+                self._key = key
+            titles, policies = self._titles, self._policies
+
+        if checked is None and options is None:
+            return titles + policies
+
+        checked = catalog.default if checked is None else checked
+        if options is None:
+            options = np.full(len(catalog), "medium", dtype=object)
+        changed_option = catalog.scalable & (options != "medium")
+
+        policies = list(policies)
+        for row in np.flatnonzero((checked != catalog.default) | changed_option):
+            policy = copy.deepcopy(policies[row])
+            _set_prop(policy, "policy-option", "checked", bool(checked[row]))
+            if changed_option[row]:
+                _set_prop(policy, "cost-dropdown", "value", options[row])
+            policies[row] = policy
+
+        return titles + policies
@@ -1,3 +1,4 @@
+import logging
 import re
 import os
 from datetime import datetime as dt
@@ -18,6 +19,8 @@ from layouts.functions.prep_data import (
     write_file,
     move_metadata_to_archive,
 )
+from layouts.functions.policy_catalog import catalog_provider
+from layouts.functions.package_encoding import PackageEncodingError, package_frame
 
 
 def save_scorecard_form():
@@ -101,6 +104,12 @@ def save_scorecard_form():
                         ],
                         style={"margin": "0rem 1rem"},
                     ),
+                    dmc.Text(
+                        color="red",
+                        size="xs",
+                        id="save-scorecard-error",
+                        style={"margin": "0rem 1rem"},
+                    ),
                     dmc.Button("Save", id="save-scorecard-button-submit"),
                 ],
             ),
@@ -143,6 +152,21 @@ def update_segmented(value):
         return show, {"display": "none"}
 
 
+def stale_package_error(e):
+    """Keeps the modal open with the reason the package couldn't be saved"""
+    logging.warning(f"Could not save the package: {e}")
+    return (
+        True,
+        dash.no_update,
+        dash.no_update,
+        dash.no_update,
+        dash.no_update,
+        {"display": "none"},
+        "The list of policies has changed since this package was built. "
+        "Reload the page and rebuild the package to save it.",
+    )
+
+
 # save button
 @app.callback(
     Output("save-scorecard-modal", "opened"),
@@ -151,6 +175,7 @@ def update_segmented(value):
     Output("save-scorecard-text-input", "error"),
     Output("save-scorecard-description-input", "error"),
     Output("load-existing-saves-scorecard-error", "style"),
+    Output("save-scorecard-error", "children"),
     Input("save-scorecard-button-open-modal", "n_clicks"),
     Input("save-scorecard-button-submit", "n_clicks"),
     State("save-segmented", "value"),
@@ -188,6 +213,7 @@ def update_save_scorecard_modal(
             name_error,
             description_error,
             {"display": "none"},
+            "",
         )
 
     # They've tried to overwrite an existing save but not selected one
@@ -199,6 +225,7 @@ def update_save_scorecard_modal(
             dash.no_update,
             dash.no_update,
             {},
+            "",
         )
 
     # brand new save 
@@ -216,7 +243,10 @@ def update_save_scorecard_modal(
             "user": get_username(href),
         }
 
-        scorecard_df = pd.DataFrame(scorecard_data)
+        try:
+            scorecard_df = package_frame(catalog_provider.get(), scorecard_data)
+        except PackageEncodingError as e:
+            return stale_package_error(e)
 
         write_file(
             scorecard_df,
@@ -234,7 +264,10 @@ def update_save_scorecard_modal(
         existing_metadata["date"] = dt.now().strftime("%Y-%m-%d %H:%M:%S")
         existing_metadata["user"] = get_username(href)
 
-        scorecard_df = pd.DataFrame(scorecard_data)
+        try:
+            scorecard_df = package_frame(catalog_provider.get(), scorecard_data)
+        except PackageEncodingError as e:
+            return stale_package_error(e)
 
         if scorecard_df.empty:
             archived_path = f"saved_scorecards/archived_metadata/{existing_save}.json"
@@ -250,4 +283,4 @@ def update_save_scorecard_modal(
                 file_name=f"saved_scorecards/metadata/{existing_save}.json",
             )
 
-    return not opened, "", "", "", "", {"display": "none"}
+    return not opened, "", "", "", "", {"display": "none"}, ""
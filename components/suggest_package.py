@@ -0,0 +1,25 @@
+import dash_mantine_components as dmc
+from dash import html
+
+
+def suggest_package_form():
+    return html.Div(
+        [
+            dmc.NumberInput(
+                id="suggest-package-budget",
+                placeholder="Budget (€mn)",
+                min=0,
+                precision=1,
+                hideControls=True,
+                size="xs",
+                style={"width": 110},
+            ),
+            dmc.Button(
+                "Suggest package",
+                color="pink",
+                compact=True,
+                id="suggest-package-button",
+            ),
+        ],
+        style={"display": "flex", "gap": "0.5rem", "align-items": "center"},
+    )
@@ -0,0 +1,24 @@
+"""
+    gunicorn settings, read from the working directory by `gunicorn main:server`
+(see the Dockerfile).
+
+The app is preloaded in the master so the policy catalog, the transport map
+geojsons and everything else loaded at import are read once and shared
+copy-on-write with the workers. Set GUNICORN_PRELOAD=false to load the app in
+each worker instead.
+
+boto3 clients aren't shared with the workers, see s3_client in
+layouts/functions/prep_data.py.
+"""
+import gc
+import os
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() != "false"
+
+
+def when_ready(server):
+    # The preloaded data lives as long as the workers, moving it out of the
+    # collected generations stops every worker's gc from writing to its pages
+    # (and copying them) on each full collection
+    if preload_app:
+        gc.freeze()
@@ -0,0 +1,60 @@
+import logging
+
+from flask import jsonify, request
+
+from app import prefix_url, server
+from layouts.functions.batch import evaluate_packages
+from layouts.functions.package_encoding import PackageEncodingError
+from layouts.functions.policy_catalog import catalog_provider
+
+MAX_PACKAGES = 100_000
+# per-policy costs are n_packages x n_policies values to serialise
+MAX_PACKAGES_WITH_POLICY_COSTS = 1_000
+
+
+@server.route(f"{prefix_url}api/packages/evaluate", methods=["POST"])
+def evaluate_packages_endpoint():
+    """
+        Costs a batch of encoded packages, see evaluate_packages.
+
+    Expects a JSON body {"packages": [...], "policy_costs": false} of up to
+    MAX_PACKAGES packages (MAX_PACKAGES_WITH_POLICY_COSTS with per-policy
+    costs), as encoded by encode_package, and returns their totals and lens
+    splits (and per-policy costs if asked for) in the order they were sent.
+    """
+    body = request.get_json(silent=True) or {}
+    packages = body.get("packages")
+    with_policy_costs = bool(body.get("policy_costs", False))
+
+    if not isinstance(packages, list):
+        return jsonify(error="Expected a list of encoded packages"), 400
+
+    max_packages = MAX_PACKAGES_WITH_POLICY_COSTS if with_policy_costs else MAX_PACKAGES
+    if len(packages) > max_packages:
+        return jsonify(error=f"At most {max_packages} packages per request"), 413
+
+    catalog = catalog_provider.get()
+    try:
+        evaluation = evaluate_packages(
+            catalog, packages, policy_costs=with_policy_costs
+        )
+    except PackageEncodingError as e:
+        return jsonify(error=str(e)), 400
+
+    logging.info(f"--- Evaluated a batch of {len(packages)} packages ---")
+
+    response = {
+        "catalog_signature": catalog.signature,
+        "totals": evaluation["totals"].tolist(),
+        "splits": {
+            lens: {"categories": split.columns.tolist(), "costs": split.values.tolist()}
+            for lens, split in evaluation["splits"].items()
+        },
+    }
+    if with_policy_costs:
+        response["policy_costs"] = {
+            "ids": evaluation["policy_costs"].columns.tolist(),
+            "costs": evaluation["policy_costs"].values.tolist(),
+        }
+
+    return jsonify(response)
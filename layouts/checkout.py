@@ -10,25 +10,23 @@ from plotly import graph_objects as go
 from app import app, layout
 from components.clear_scorecard import clear_scorecard_button
 from components.load_scorecards import load_scorecard_dropdown_options
-from components.policy_options import policy_categories
 from components.save_scorecard import save_scorecard_form
 from components.table import create_dashboard_detail_table
 from components.spend_type_div import spend_type_div
 
-from layouts.functions.prep_data import import_data, calculate_percentage_costs
 from layouts.functions.utils import get_username
 from layouts.functions.prep_data import (
-    json_from_s3,
     write_file,
     get_saved_scorecards_metadata,
 )
-from layouts.functions.graph import get_treemap
+from layouts.functions.scorecards import load_scorecards
+from layouts.functions.graph import get_treemap_dict
 from layouts.functions.utils import lens_1_categories, lens_2_categories
+from layouts.functions.policy_catalog import catalog_provider
+from layouts.functions.cache import FigureCache
 
-full_df = import_data("policy_costs_scalable.csv")
-full_df["cost"] = full_df["medium"]
-full_df["id"] = full_df["policy_options"].str.lower().str.replace(" ", "-")
-full_df["flag"] = full_df["flag"].str.strip(" ")
+# graphs and tables of each "Group by" view of recent selections
+checkout_views_cache = FigureCache(maxsize=64)
 
 
 layout.add_full_page(
@@ -175,41 +173,20 @@ def update_graph(saved_scorecards, radio_value):
     else:
         groupby_value = "lens_2"
 
-    # append the saved scorecards to the full_df
-    df = pd.DataFrame()
-    for file in saved_scorecards:
-        package_df = import_data(f"saved_scorecards/{file}.csv")
+    # the saved scorecards costed against the catalog, read once for the graph and tables
+    catalog = catalog_provider.get()
+    selection = load_scorecards(catalog, saved_scorecards)
 
-        # costs of policies have changed over time so we only need whether the choice was Low, Medium or High
-        package_df = package_df[["id", "option"]]
-        package_df = package_df.merge(full_df, on="id", how="left")
+    # each view is a projection of the selection's cube, drawn once per selection
+    view_key = (selection.key, "graph", groupby_value)
+    fig = checkout_views_cache.get(view_key, catalog.signature)
+    if fig is not None:
+        return fig
 
-        cost = []
-        for row in package_df.to_dict("records"):
-            cost.append(row[row["option"]])
-
-        package_df["cost"] = cost
-
-        # take only options that are still in play
-        package_df = package_df[package_df["id"].isin(full_df["id"])]
-        package_df = package_df.dropna(subset=["lens_1", "lens_2"])
-
-        # add package name to dataframe
-        metadata_dict = json_from_s3(f"saved_scorecards/metadata/{file}.json")
-        package_total = round(package_df["cost"].sum(), 1)
-        package_df["package"] = f"{metadata_dict['name']}"
-        package_df[
-            "package_with_cost"
-        ] = f"{metadata_dict['name']} (€{package_total}mn)"
-
-        # append to df
-        df = df.append(package_df)
-
-    df = df.reset_index()
+    df = selection.cube()
 
     # groupby the radio value
-    domain_df = df.copy()
-    domain_groupby_df = domain_df.groupby([groupby_value]).sum().reset_index()
+    domain_groupby_df = selection.group_costs(groupby_value).reset_index()
     domain_groupby_df = domain_groupby_df.sort_values("cost", ascending=False)
 
     domain_groupby_df["percentage_cost"] = round(
@@ -240,9 +217,10 @@ def update_graph(saved_scorecards, radio_value):
             df["policy_options"] + " (*" + df["package"] + " package)"
         )
 
-    fig = get_treemap(
+    fig = get_treemap_dict(
         df.reset_index(), path=["type", groupby_value, "policy_options"], length=15
     )
+    checkout_views_cache.set(view_key, catalog.signature, fig)
 
     return fig
 
@@ -265,29 +243,15 @@ def update_tables(saved_scorecards, radio_value):
         groupby_value = "lens_2"
 
     # get data
-    df = pd.DataFrame()
-    for file in saved_scorecards:
-        package_df = import_data(f"saved_scorecards/{file}.csv")
-        package_df = package_df[["id", "option"]]
-        package_df = package_df.merge(full_df, on="id", how="left")
-
-        cost = []
-        for row in package_df.to_dict("records"):
-            cost.append(row[row["option"]])
-
-        package_df["cost"] = cost
-        package_df = package_df[package_df["id"].isin(full_df["id"])]
-        package_df = package_df.dropna(subset=["lens_1", "lens_2"])
-        metadata_dict = json_from_s3(f"saved_scorecards/metadata/{file}.json")
-        package_total = round(package_df["cost"].sum(), 1)
-        package_df["package"] = f"{metadata_dict['name']}"
-        package_df[
-            "package_with_cost"
-        ] = f"{metadata_dict['name']} (€{package_total}mn)"
-
-        df = df.append(package_df)
-
-    df = df.reset_index()
+    catalog = catalog_provider.get()
+    selection = load_scorecards(catalog, saved_scorecards)
+
+    view_key = (selection.key, "tables", groupby_value)
+    tables = checkout_views_cache.get(view_key, catalog.signature)
+    if tables is not None:
+        return tables
+
+    df = selection.cube()
 
     policy_df = df.copy()
     policy_df["percentage_cost"] = round(
@@ -320,7 +284,7 @@ def update_tables(saved_scorecards, radio_value):
     table = create_dashboard_detail_table(table_policy_df)
 
     domain_df = df.copy()
-    domain_groupby_df = domain_df.groupby([groupby_value]).sum().reset_index()
+    domain_groupby_df = selection.group_costs(groupby_value).reset_index()
     domain_groupby_df = domain_groupby_df.sort_values("cost", ascending=False)
 
     domain_groupby_df["percentage_cost"] = round(
@@ -344,4 +308,6 @@ def update_tables(saved_scorecards, radio_value):
 
     domain_table = create_dashboard_detail_table(domain_table_df)
 
+    checkout_views_cache.set(view_key, catalog.signature, (table, domain_table))
+
     return table, domain_table
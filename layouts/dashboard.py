@@ -2,38 +2,64 @@ import logging
 import random
 import dash
 import dash_mantine_components as dmc
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from dash import ALL, Input, Output, State, dcc, html
+from dash import ALL, ClientsideFunction, Input, Output, State, dcc, html
 from plotly import graph_objects as go
 
 from app import app, layout
 from components.clear_scorecard import clear_scorecard_button
 from components.load_scorecards import load_scorecard_modal
-from components.policy_options import policy_categories
+from components.policy_options import PolicyOptionsCache
 from components.save_scorecard import save_scorecard_form
-from components.spend_type_div import spend_type_div
+from components.suggest_package import suggest_package_form
 from layouts.functions.utils import lens_1_categories, lens_2_categories
 
-from layouts.functions.prep_data import import_data, calculate_percentage_costs
+from layouts.functions.prep_data import import_data
 from layouts.functions.utils import get_username
-from layouts.functions.graph import get_treemap
+from layouts.functions.graph import get_package_treemap_dict, package_treemap_patch
+from layouts.functions.cache import FigureCache, package_signature
+from layouts.functions.package_state import PackageState
+from layouts.functions.solver import InfeasiblePackageError, suggest_package
+from layouts.functions.uncertainty import package_cost_percentiles
+from layouts.functions.policy_catalog import catalog_provider
+from layouts.functions.package_encoding import (
+    PackageEncodingError,
+    encode_package,
+    package_frame,
+)
+
+LENS_CATEGORIES = {"lens_1": lens_1_categories, "lens_2": lens_2_categories}
 
-df = import_data("policy_costs_scalable.csv")
-df["cost"] = df["medium"]
-df["id"] = df["policy_options"].str.lower().str.replace(" ", "-")
-df["flag"] = df["flag"].str.strip(" ")
+# finished treemaps for packages that have already been drawn
+treemap_cache = FigureCache(maxsize=512)
+# simulated cost ranges of packages that have already been costed
+uncertainty_cache = FigureCache(maxsize=256)
+# default policy option trees, only the policies a package changes are rebuilt
+policy_options_cache = PolicyOptionsCache()
+# dropped as soon as a repriced catalog is swapped in
+catalog_provider.on_reload(lambda catalog: treemap_cache.clear())
+catalog_provider.on_reload(lambda catalog: policy_options_cache.clear())
+catalog_provider.on_reload(lambda catalog: uncertainty_cache.clear())
 
 
 left_panel = [
     html.Div(
         [
             dcc.Store(id="save-scorecard-store", storage_type="session", data=[]),
+            # policies and options of the last package, to spot patchable changes
+            dcc.Store(id="package-state-store"),
+            # sent once per page load for the clientside totals and search
+            dcc.Store(id="policy-catalog-store"),
+            # signature of a newer catalog a package was costed against
+            dcc.Store(id="policy-catalog-refresh"),
             dmc.TextInput(
                 placeholder="Search...",
                 style={"width": 250},
                 id="search-input",
                 size="xs",
+                debounce=200,
             ),
             dmc.SegmentedControl(
                 id="policy-lens",
@@ -48,11 +74,13 @@ left_panel = [
             save_scorecard_form(),
             load_scorecard_modal(),
             clear_scorecard_button(),
+            suggest_package_form(),
         ],
         style={"display": "flex", "gap": "0.5rem", "align-items": "center"},
     ),
     html.Div(
         id="policy-options-container",
+        className="policy-options lens_1",
         style={"display": "flex", "flex-direction": "column"},
     ),
 ]
@@ -80,6 +108,7 @@ layout.add_half_page(
                     ],
                     style={"display": "flex", "gap": "1rem", "align-items": "center"},
                 ),
+                dmc.Text(id="package-cost-range", size="sm", color="dimmed"),
                 html.Div(
                     id="package-split", style={"display": "flex", "flex-wrap": "wrap"}
                 ),
@@ -110,157 +139,250 @@ layout.add_half_page(
 )
 
 
-def get_policies_on(policy_options_checked, policy_ids, scalable_options):
-    total_policies = df.copy()
-    total_policies = total_policies.drop(columns=["on_off"])
+def package_cost_range(catalog, rows, options, signature):
+    """Likely cost range of a package, cached by its signature"""
+    # the draws are seeded by the package, so the same package gets the same range
+    percentiles = uncertainty_cache.get(signature, catalog.signature)
+    if percentiles is None:
+        percentiles = package_cost_percentiles(
+            catalog, rows, options, seed=int(signature[:8], 16)
+        )
+        uncertainty_cache.set(signature, catalog.signature, percentiles)
 
-    policy_dicts = []
-    for i, policy_id in enumerate(policy_ids):
-        policy_row_dict = {
-            "id": policy_ids[i]["index"],
-            "on_off": policy_options_checked[i],
-            "option": scalable_options[i] if scalable_options[i] != None else "medium",
-        }
-        policy_dicts.append(policy_row_dict)
+    total = percentiles["total"]
+    return (
+        f"Likely range (P10–P90): €{total['p10']}mn – €{total['p90']}mn"
+        f" (P50 €{total['p50']}mn)"
+    )
 
-    policy_df = pd.DataFrame(policy_dicts)
-    policies_on_df = policy_df[policy_df["on_off"] == True]
 
-    if policies_on_df.empty:
-        return go.Figure()
+def get_package_state(
+    catalog, package_state, policy_options_checked, policy_ids, scalable_options
+):
+    """
+        Package state of the checkbox/dropdown values in this request, and
+    whether it only changed the option of a selected policy since the stored
+    state, in which case the figure can be patched.
+
+    Returns the state and the id of that policy or None.
+    """
+    state = PackageState.from_inputs(
+        catalog, policy_options_checked, policy_ids, scalable_options
+    )
 
-    policies_on_w_costs = policies_on_df.merge(total_policies, on="id", how="left")
+    ctx = dash.callback_context
+    if (
+        package_state
+        and len(ctx.triggered) == 1
+        and isinstance(ctx.triggered_id, dict)
+        and ctx.triggered_id["type"] == "cost-dropdown"
+    ):
+        policy_id = ctx.triggered_id["index"]
+        if state.is_option_change(PackageState.from_dict(package_state), policy_id):
+            return state, policy_id
 
-    return policies_on_w_costs
+    return state, None
 
 
 # CALLBACKS
+# the total and category split are summed in the browser, see assets/policy_builder.js
+app.clientside_callback(
+    ClientsideFunction(namespace="policy_builder", function_name="update_totals"),
+    Output("total-package-cost", "children"),
+    Output("package-split", "children"),
+    Input({"type": "policy-option", "index": ALL}, "checked"),
+    Input({"type": "policy-option", "index": ALL}, "id"),
+    Input({"type": "cost-dropdown", "index": ALL}, "value"),
+    Input("policy-lens", "value"),
+    Input("policy-catalog-store", "data"),
+    prevent_initial_call=True,
+)
+
+
 @app.callback(
     Output("budget-graph", "figure"),
-    Output("fullscreen-graph", "figure"),
     Output("save-scorecard-store", "data"),
-    Output("total-package-cost", "children"),
-    Output("package-split", "children"),
+    Output("package-state-store", "data"),
+    Output("package-cost-range", "children"),
     Input({"type": "policy-option", "index": ALL}, "checked"),
     Input({"type": "policy-option", "index": ALL}, "id"),
     Input({"type": "cost-dropdown", "index": ALL}, "value"),
-    State("policy-lens", "value"),
+    State("package-state-store", "data"),
     State("10ds-url", "href"),
     prevent_initial_call=True,
 )
 def update_figure(
-    policy_options_checked, policy_ids, scalable_options, policy_lens, href
+    policy_options_checked, policy_ids, scalable_options, package_state, href
 ):
     if True in policy_options_checked:
         logging.warning(f"Policies being selected by {get_username(href)}")
-        policies_on_w_costs = get_policies_on(
-            policy_options_checked, policy_ids, scalable_options
+        catalog = catalog_provider.get()
+        state, changed_policy = get_package_state(
+            catalog, package_state, policy_options_checked, policy_ids, scalable_options
         )
+        if not state.selected:
+            return go.Figure(), [], state.to_dict(), ""
 
-        # This createst the cost column
-        # If it is scalable, option could be (v. low, low, medium, high)
-        # If not scalable, option will be medium by default
-        # It takes the option and then creates the "cost" column with the correct number
-        policies_on_w_costs["cost"] = policies_on_w_costs.apply(
-            lambda row: row[row["option"]], axis=1
-        )
-        total_cost = round(policies_on_w_costs["cost"].sum(), 1)
-        policies_on_w_costs["type"] = f"Total (€{total_cost}mn)"
+        # the treemap draws the policies in catalog order
+        rows = np.sort(catalog.rows(list(state.selected)))
+        policy_ids_on = catalog.ids[rows].tolist()
+        options_on = [state.selected[policy_id] for policy_id in policy_ids_on]
+        costs = catalog.option_costs(rows, options_on)
+        total = sum(np.nan_to_num(costs).tolist())
+        root_label = f"Total (€{round(total, 1)}mn)"
+        package = encode_package(catalog, policy_ids_on, options_on)
+        signature = package_signature(policy_ids_on, options_on)
+        cost_range = package_cost_range(catalog, rows, options_on, signature)
 
-        policies_to_plot_df = policies_on_w_costs.copy()
-        fig = get_treemap(policies_to_plot_df)
-        fig.update_layout(margin=dict(t=0, b=0, l=0, r=20))
+        # a new option for a selected policy only changes its tile and the root
+        if changed_policy is not None:
+            position = policy_ids_on.index(changed_policy)
+            leaf = catalog.selection(rows[[position]], [options_on[position]])
+            leaf["cost"] = costs[position]
 
-        # Breaks down the policy options by the lens category
-        lens_categories = (
-            lens_1_categories if policy_lens == "lens_1" else lens_2_categories
-        )
-        percentage_costs = calculate_percentage_costs(policies_to_plot_df, policy_lens)
-        category_outputs = [
-            spend_type_div(category, percentage_costs.get(category, {"%": 0, "€": 0}))
-            for category in lens_categories
-        ]
+            fig = package_treemap_patch(position, leaf, total, root_label)
+            return fig, package, state.to_dict(), cost_range
 
-        return (
-            fig,
-            fig,  # full-screen graph
-            policies_on_w_costs.to_dict("records"),  # to the datastore
-            f"€{total_cost}mn",
-            category_outputs,
-        )
+        # the treemap only depends on which policies are on and their options
+        fig = treemap_cache.get(signature, catalog.signature)
+        if fig is None:
+            policies_on_w_costs = catalog.selection(rows, options_on)
+
+            # If it is scalable, option could be (v. low, low, medium, high)
+            # If not scalable, option will be medium by default
+            policies_on_w_costs["cost"] = costs
+
+            fig = get_package_treemap_dict(policies_on_w_costs, root_label)
+            treemap_cache.set(signature, catalog.signature, fig)
+
+        logging.debug(f"Treemap cache: {treemap_cache.stats()}")
+
+        return fig, package, state.to_dict(), cost_range  # package to the datastore
 
     else:
-        return go.Figure(), go.Figure(), [], "-", []
+        return go.Figure(), [], None, ""
+
+
+def package_checkboxes(catalog, package_df):
+    """
+        Checked state and chosen option of every catalog row for the
+    policies (id, on_off, option) of a stored package.
+    """
+    rows = catalog.rows(package_df["id"].tolist())
+    known = rows >= 0
+
+    checked = np.zeros(len(catalog), dtype=bool)
+    checked[rows[known]] = (
+        package_df["on_off"].fillna(False).to_numpy(dtype=bool)[known]
+    )
+
+    options = np.full(len(catalog), "medium", dtype=object)
+    options[rows[known]] = package_df["option"].fillna("medium").to_numpy()[known]
+
+    return checked, options
+
+
+# compared in the browser so the catalog is never uploaded, only a changed
+# signature reaches update_policy_catalog_store
+app.clientside_callback(
+    ClientsideFunction(namespace="policy_builder", function_name="catalog_refresh"),
+    Output("policy-catalog-refresh", "data"),
+    Input("package-state-store", "data"),
+    State("policy-catalog-store", "data"),
+    prevent_initial_call=True,
+)
+
+
+@app.callback(
+    Output("policy-catalog-store", "data"),
+    Input("10ds-url", "pathname"),
+    Input("policy-catalog-refresh", "data"),
+)
+def update_policy_catalog_store(pathname, catalog_signature):
+    # re-sent on page load and whenever a package is costed against a
+    # reloaded catalog
+    return catalog_provider.get().to_client(LENS_CATEGORIES)
 
 
 @app.callback(
     Output("policy-options-container", "children"),
+    Output("suggest-package-budget", "error"),
     Input("load-scorecard-button-submit", "n_clicks"),
     Input("10ds-url", "pathname"),
     Input("clear-scorecard-button", "n_clicks"),
-    Input("policy-lens", "value"),
+    Input("suggest-package-button", "n_clicks"),
     State("save-scorecard-store", "data"),
     State("load-scorecard-select", "value"),
+    State("suggest-package-budget", "value"),
 )
 def loading_saving_and_inprogress_packages(
-    submit, pathname, clear_scorecard, policy_lens, saved_data, selected_values
+    submit,
+    pathname,
+    clear_scorecard,
+    suggest_package_clicks,
+    saved_data,
+    selected_values,
+    budget,
 ):
-    total_policies = df.copy()
-
     prop_id = dash.callback_context.triggered[0]["prop_id"]
-    lens_categories = (
-        lens_1_categories if policy_lens == "lens_1" else lens_2_categories
-    )
+    catalog = catalog_provider.get()
 
     logging.info(prop_id)
     # resurrecting an old save
     if "load-scorecard-button-submit" in prop_id:
         saved_policies = import_data(f"saved_scorecards/{selected_values}.csv")
-        df_categories = df.copy()[["id", policy_lens]]
-        saved_policies = saved_policies.merge(df_categories, on="id", how="left")
+        checked, options = package_checkboxes(catalog, saved_policies)
 
-        total_policies = total_policies.drop(columns=["on_off"])
-        policies_to_load = total_policies.merge(
-            saved_policies[["id", "on_off", "option"]], on="id", how="left"
+        return (
+            policy_options_cache.children(catalog, LENS_CATEGORIES, checked, options),
+            "",
         )
-        policies_to_load["option"] = policies_to_load["option"].fillna("medium")
 
-        return [
-            policy_categories(
-                category,
-                policies_to_load[policies_to_load[policy_lens] == category],
-            )
-            for category in lens_categories
-        ]
+    # best package for the budget, see layouts/functions/solver.py
+    elif "suggest-package-button" in prop_id:
+        try:
+            rows, options = suggest_package(catalog, budget)
+        except InfeasiblePackageError as e:
+            logging.warning(f"Could not suggest a package: {e}")
+            return dash.no_update, str(e)
+
+        checked = np.zeros(len(catalog), dtype=bool)
+        checked[rows] = True
+        all_options = np.full(len(catalog), "medium", dtype=object)
+        all_options[rows] = options
+
+        return (
+            policy_options_cache.children(
+                catalog, LENS_CATEGORIES, checked, all_options
+            ),
+            "",
+        )
 
     # if policy checklist is being cleared or nothing is stored
     elif ("clear-scorecard-button" in prop_id) | (not bool(saved_data)):
-        total_policies["on_off"] = total_policies["default"]
-        total_policies["option"] = "medium"
-
-        return [
-            policy_categories(
-                category,
-                total_policies[total_policies[policy_lens] == category],
-            )
-            for category in lens_categories
-        ]
+        return policy_options_cache.children(catalog, LENS_CATEGORIES), ""
 
     # If the page is refreshed then this loads the session stored data
     elif bool(saved_data):
-        df_options = pd.DataFrame(saved_data)
-        total_policies = total_policies.drop(columns=["on_off"])
-        policies_to_load = total_policies.merge(
-            df_options[["id", "on_off", "option"]], on="id", how="left"
+        try:
+            df_options = package_frame(catalog, saved_data)
+        except PackageEncodingError as e:
+            logging.warning(f"Could not restore the stored package: {e}")
+            df_options = pd.DataFrame(columns=["id", "on_off", "option"])
+
+        checked, options = package_checkboxes(catalog, df_options)
+        return (
+            policy_options_cache.children(catalog, LENS_CATEGORIES, checked, options),
+            "",
         )
-        policies_to_load["option"] = policies_to_load["option"].fillna("medium")
-        return [
-            policy_categories(
-                category,
-                policies_to_load[policies_to_load[policy_lens] == category],
-            )
-            for category in lens_categories
-        ]
+
+
+# both lens groupings are in the page, switching only changes which is shown
+app.clientside_callback(
+    ClientsideFunction(namespace="policy_builder", function_name="lens_class"),
+    Output("policy-options-container", "className"),
+    Input("policy-lens", "value"),
+)
 
 
 @app.callback(
@@ -273,24 +395,21 @@ def open_fullscreen_graph(n_clicks, opened):
     return not opened
 
 
-@app.callback(
-    [Output({"type": "policy-option-div", "index": ALL}, "style")],
-    Input("search-input", "value"),
-    State({"type": "policy-option-div", "index": ALL}, "id"),
+# only copied over, in the browser, when the modal is opened
+app.clientside_callback(
+    ClientsideFunction(namespace="policy_builder", function_name="fullscreen_figure"),
+    Output("fullscreen-graph", "figure"),
+    Input("modal-graph", "opened"),
+    State("budget-graph", "figure"),
+    prevent_initial_call=True,
 )
-def search_filter_policies(search, ids):
-    search = search.lower().replace(" ", "-")
-    DEFAULT_STYLE = {}
 
-    if (search == "") | (search == None):
-        styles = [DEFAULT_STYLE for x in ids]
 
-    else:
-        styles = []
-        for policy in ids:
-            if search in policy["index"]:
-                styles.append(DEFAULT_STYLE)
-            else:
-                styles.append({"display": "none"})
-
-    return [styles]
+# searched in the browser against the token index shipped in policy-catalog-store
+app.clientside_callback(
+    ClientsideFunction(namespace="policy_builder", function_name="search_policies"),
+    Output({"type": "policy-row", "index": ALL}, "hidden"),
+    Input("search-input", "value"),
+    Input("policy-catalog-store", "data"),
+    State({"type": "policy-row", "index": ALL}, "id"),
+)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from layouts.functions.catalog import LENSES
+
+
+def category_costs(df, lenses=LENSES, values="cost"):
+    """
+        Total cost of every category of several lenses in a single pass.
+
+    The lens columns are integer coded, offset so that every lens has its own
+    range of codes, and the costs summed with one bincount over all of them.
+    Uncosted policies (NaN) count as 0 and policies without a category in a
+    lens are left out of that lens.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Policies with the lens and cost columns.
+    lenses: list of str
+        Lens columns to total the costs by.
+    values: str
+        Cost column.
+
+    Returns
+    -------
+    dict
+        {lens: pd.Series} of the category totals of each lens, in order of
+        first appearance.
+    """
+    costs = np.nan_to_num(df[values].to_numpy(dtype=np.float64))
+
+    codes, weights, categories, offsets = [], [], {}, [0]
+    for lens in lenses:
+        lens_codes, categories[lens] = pd.factorize(df[lens])
+        known = lens_codes >= 0
+        codes.append(lens_codes[known] + offsets[-1])
+        weights.append(costs[known])
+        offsets.append(offsets[-1] + len(categories[lens]))
+
+    totals = np.bincount(
+        np.concatenate(codes), weights=np.concatenate(weights), minlength=offsets[-1]
+    )
+
+    return {
+        lens: pd.Series(totals[start:end], index=categories[lens], name=values)
+        for lens, start, end in zip(lenses, offsets, offsets[1:])
+    }
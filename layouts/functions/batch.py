@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from layouts.functions.catalog import LENSES
+from layouts.functions.package_encoding import decode_packages
+
+# packages costed per matrix product, bounds the memory a batch needs
+CHUNK_SIZE = 10_000
+
+
+def lens_indicator(catalog, lens):
+    """n_policies x n_categories 0/1 matrix of the category of each policy in a lens"""
+    categories = np.arange(len(catalog.lens_labels[lens]))
+    return (catalog.lens_codes[lens][:, None] == categories[None, :]).astype(np.float64)
+
+
+def evaluate_packages(catalog, encoded_packages, lenses=LENSES, policy_costs=False):
+    """
+        Costs a batch of encoded packages at once, for what-if sweeps.
+
+    The chosen cost of every policy of every package (selection x cost
+    matrix) is summed into totals and, with one product with a policy x
+    category indicator matrix per lens, into lens splits. Uncosted levels
+    count as 0, as in the dashboard.
+
+    Raises a PackageEncodingError if any package can't be decoded against
+    the catalog.
+
+    Parameters
+    ----------
+    catalog: PolicyCatalog
+        Catalog the packages were encoded against.
+    encoded_packages: list of str
+        Packages as encoded by encode_package.
+    lenses: list of str
+        Lenses to split the costs by.
+    policy_costs: bool
+        Whether to also return the cost of every policy in every package,
+        an n_packages x n_policies frame.
+
+    Returns
+    -------
+    dict
+        {"totals": pd.Series, "splits": {lens: pd.DataFrame}, "policy_costs":
+        pd.DataFrame or None}, indexed by the position of each package in
+        the batch.
+    """
+    selected, codes = decode_packages(catalog, encoded_packages)
+    costs = np.nan_to_num(catalog.costs)
+    indicators = {lens: lens_indicator(catalog, lens) for lens in lenses}
+    policies = np.arange(len(catalog))
+
+    n_packages = len(selected)
+    totals = np.empty(n_packages)
+    splits = {
+        lens: np.empty((n_packages, indicator.shape[1]))
+        for lens, indicator in indicators.items()
+    }
+    package_costs = np.empty((n_packages, len(catalog))) if policy_costs else None
+
+    for start in range(0, n_packages, CHUNK_SIZE):
+        chunk = slice(start, start + CHUNK_SIZE)
+        chunk_costs = np.where(selected[chunk], costs[policies, codes[chunk]], 0)
+
+        totals[chunk] = chunk_costs.sum(axis=1)
+        for lens, indicator in indicators.items():
+            splits[lens][chunk] = chunk_costs @ indicator
+
+        if policy_costs:
+            package_costs[chunk] = chunk_costs
+
+    return {
+        "totals": pd.Series(totals, name="total"),
+        "splits": {
+            lens: pd.DataFrame(split, columns=list(catalog.lens_labels[lens]))
+            for lens, split in splits.items()
+        },
+        "policy_costs": (
+            pd.DataFrame(package_costs, columns=catalog.ids) if policy_costs else None
+        ),
+    }
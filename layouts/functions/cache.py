@@ -0,0 +1,78 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def package_signature(policy_ids, options, lens=None):
+    """
+        Canonical hash of a package, independent of the order policies are listed in.
+
+    Parameters
+    ----------
+    policy_ids: list of str
+        Ids of the selected policies.
+    options: list of str
+        Chosen cost level of each selected policy.
+    lens: str, optional
+        Lens the output is grouped by, if it depends on one.
+    """
+    package = sorted(zip(policy_ids, options))
+    payload = json.dumps([package, lens], separators=(",", ":"))
+
+    return hashlib.sha1(payload.encode("UTF-8")).hexdigest()
+
+
+class FigureCache:
+    """
+        Bounded, thread-safe LRU cache of rendered figures.
+
+    Entries are only valid for the catalog they were rendered from, the cache
+    empties itself the first time it sees a different catalog signature.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._catalog_signature = None
+        self._lock = threading.Lock()
+
+    def _check_catalog(self, catalog_signature):
+        if catalog_signature != self._catalog_signature:
+            self._figures.clear()
+            self._catalog_signature = catalog_signature
+
+    def get(self, key, catalog_signature):
+        with self._lock:
+            self._check_catalog(catalog_signature)
+            figure = self._figures.get(key)
+            if figure is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._figures.move_to_end(key)
+
+            return figure
+
+    def set(self, key, catalog_signature, figure):
+        with self._lock:
+            self._check_catalog(catalog_signature)
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._figures),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,205 @@
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+
+from layouts.functions.utils import cache_labels
+
+# scalable policies can be costed at any of these levels, in this column order
+OPTION_LEVELS = ["very-low", "low", "medium", "high"]
+LENSES = ["lens_1", "lens_2"]
+# line lengths the dashboard and checkout treemaps wrap policy names to
+LABEL_LENGTHS = [20, 15]
+# stored compactly in the shared catalog frame, see compact_catalog
+CATEGORICAL_COLUMNS = LENSES + ["flag"]
+COST_COLUMNS = OPTION_LEVELS + ["cost"]
+_OPTION_INDEX = pd.Index(OPTION_LEVELS)
+# same tokenisation as the clientside search in assets/policy_builder.js
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def option_codes(options):
+    """Column codes in the cost matrix for option labels, -1 for unknown labels"""
+    return _OPTION_INDEX.get_indexer(np.asarray(options, dtype=object))
+
+
+def gather_costs(costs, rows, codes):
+    """
+        Picks one cost per row out of a cost matrix in a single pass.
+
+    Parameters
+    ----------
+    costs: np.ndarray
+        n x 4 matrix of the very-low/low/medium/high costs.
+    rows: np.ndarray
+        Row of the cost matrix for each output value.
+    codes: np.ndarray
+        Column of the cost matrix for each output value (see option_codes),
+        unknown options (-1) resolve to NaN.
+    """
+    gathered = costs[rows, codes]
+    return np.where(codes >= 0, gathered, np.nan)
+
+
+def compact_catalog(df):
+    """
+        Catalog frame with the repeated lens and flag labels as categoricals,
+    so each worker holds as little of it as possible, and float64 costs.
+    """
+    dtypes = {column: "category" for column in CATEGORICAL_COLUMNS}
+    dtypes.update({column: np.float64 for column in COST_COLUMNS if column in df})
+
+    return df.astype(dtypes)
+
+
+class PolicyCatalog:
+    """
+        Columnar, read-only view of the policy cost catalog.
+
+    Built once per worker so that callbacks can resolve a selection of policy
+    ids with array indexing rather than copying and merging the whole frame.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Normalised catalog with (at least) the id, policy_options, flag, lens
+        and cost level columns.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.ids = self.df["id"].to_numpy()
+        self.index = {policy_id: row for row, policy_id in enumerate(self.ids)}
+
+        # n_policies x 4 matrix of the very-low/low/medium/high costs
+        self.costs = self.df[OPTION_LEVELS].to_numpy(dtype=np.float64)
+
+        # integer coded lens columns, codes index into lens_labels
+        self.lens_codes = {}
+        self.lens_labels = {}
+        for lens in LENSES:
+            codes, labels = pd.factorize(self.df[lens])
+            self.lens_codes[lens] = codes
+            self.lens_labels[lens] = list(labels)
+
+        self.scalable = (self.df["flag"] == "scalable").to_numpy()
+        self.default = self.df["default"].fillna(False).to_numpy(dtype=bool)
+
+        # policy names never change, so wrap them once for the treemap labels
+        cache_labels(self.df["policy_options"].unique(), LABEL_LENGTHS)
+
+        # shared read-only, e.g. copy-on-write between preloaded gunicorn workers
+        for array in [self.ids, self.costs, self.scalable, self.default]:
+            array.setflags(write=False)
+        for codes in self.lens_codes.values():
+            codes.setflags(write=False)
+
+        # changes when policies are added, removed, reordered or switch between
+        # scalable and fixed, i.e. whenever encoded packages would decode differently
+        self.encoding_signature = hashlib.sha1(
+            "\n".join(
+                f"{policy_id}:{int(scalable)}"
+                for policy_id, scalable in zip(self.ids.tolist(), self.scalable)
+            ).encode("UTF-8")
+        ).hexdigest()[:8]
+
+        # changes whenever the catalog contents do, used to invalidate caches
+        self.signature = hashlib.sha1(
+            pd.util.hash_pandas_object(self.df, index=False).to_numpy().tobytes()
+        ).hexdigest()
+
+        # to_client output, by lens categories
+        self._client = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, policy_ids):
+        """Catalog row positions for the given ids, -1 for unknown ids"""
+        return np.fromiter(
+            (self.index.get(policy_id, -1) for policy_id in policy_ids),
+            dtype=np.intp,
+            count=len(policy_ids),
+        )
+
+    def option_costs(self, rows, options):
+        """Cost of the chosen option for each of the given catalog rows"""
+        return gather_costs(self.costs, rows, option_codes(options))
+
+    def to_client(self, lens_categories):
+        """
+            Compact JSON-able catalog for clientside callbacks.
+
+        Costs are sent as one list per level (null where a level isn't
+        offered) and lenses as codes into the ordered category lists. Built
+        once per lens categories, the catalog being read-only.
+
+        Parameters
+        ----------
+        lens_categories: dict
+            Ordered categories to display for each lens, e.g.
+            {"lens_1": lens_1_categories, "lens_2": lens_2_categories}.
+        """
+        key = tuple(
+            (lens, tuple(categories)) for lens, categories in lens_categories.items()
+        )
+        if key in self._client:
+            return self._client[key]
+
+        costs = self.costs.astype(object)
+        costs[np.isnan(self.costs)] = None
+
+        lenses = {}
+        for lens, categories in lens_categories.items():
+            positions = {category: code for code, category in enumerate(categories)}
+            labels = self.df[lens].tolist()
+            lenses[lens] = {
+                "categories": list(categories),
+                "codes": [positions.get(label, -1) for label in labels],
+            }
+
+        self._client[key] = {
+            "signature": self.signature,
+            "ids": self.ids.tolist(),
+            "levels": OPTION_LEVELS,
+            "costs": [costs[:, code].tolist() for code in range(len(OPTION_LEVELS))],
+            "lenses": lenses,
+            "search": self.search_index(),
+        }
+        return self._client[key]
+
+    def search_index(self):
+        """
+            Token index of the policy names and lens labels for the clientside
+        search.
+
+        Returns the distinct tokens, sorted so prefixes can be binary searched,
+        and for each token the catalog rows it appears in.
+        """
+        postings = {}
+        texts = self.df[["policy_options"] + LENSES].astype(object).fillna("")
+        for row, values in enumerate(texts.itertuples(index=False)):
+            for token in set(_TOKEN_PATTERN.findall(" ".join(values).lower())):
+                postings.setdefault(token, []).append(row)
+
+        tokens = sorted(postings)
+        return {"tokens": tokens, "rows": [postings[token] for token in tokens]}
+
+    def selection(self, rows, options):
+        """
+            Catalog rows for a selection of policies, with the chosen option.
+
+        Returns a frame shaped like the old merge of the checkbox states onto
+        the catalog (id, on_off, option, then the catalog columns), with plain
+        object labels rather than categoricals.
+        """
+        selected = self.df.iloc[rows].drop(columns=["on_off"], errors="ignore")
+        for column in selected.columns.intersection(CATEGORICAL_COLUMNS):
+            selected[column] = selected[column].astype(object)
+
+        selected.insert(0, "option", list(options))
+        selected.insert(0, "on_off", True)
+        selected.insert(0, "id", selected.pop("id"))
+
+        return selected.reset_index(drop=True)
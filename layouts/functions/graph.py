@@ -1,39 +1,49 @@
-import plotly.express as px
-
+from functools import reduce
 
-def get_treemap(df, path=["type", "policy_options"], length=20):
-    def _add_breaks(text):
-        words = text.split()
-        lines = []
-        line = ""
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from dash import Patch
 
-        for word in words:
-            if len(line) + len(word) + 1 <= length:
-                line = f"{line} {word}" if line else word
-            else:
-                lines.append(line)
-                line = word
+from layouts.functions.utils import wrap_label
 
-        lines.append(line)
+PACKAGE_ROOT_ID = "total"
 
-        return "<br>".join(lines)
 
-    df["policy_options"] = df["policy_options"].apply(_add_breaks)
+def policy_labels(df, length, values="cost"):
+    """
+        Treemap tile labels: the cost, the chosen option for scalable policies
+    and the policy name wrapped to the given line length.
 
-    df.loc[df["flag"] == "scalable", "scalable_text"] = (
-        "<i>(" + df["option"].str.title() + ")</i>"
+    Doesn't modify df, the wrapped names of catalog policies are cached
+    (see cache_labels).
+    """
+    wrapped = [wrap_label(name, length) for name in df["policy_options"]]
+    scalable_text = ("<i>(" + df["option"].str.title() + ")</i>").where(
+        df["flag"] == "scalable", ""
     )
-    df.loc[df["flag"] != "scalable", "scalable_text"] = ""
 
-    df["policy_options"] = (
+    return (
         "<b>€"
-        + df["cost"].apply(lambda x: round(x, 1)).astype(str)
+        + df[values].round(1).astype(str)
         + "mn</b> "
-        + df["scalable_text"]
+        + scalable_text
         + "<br>"
-        + df["policy_options"]
+        + pd.Series(wrapped, index=df.index)
     )
 
+
+def _treemap_layout():
+    return {
+        "template": pio.templates[pio.templates.default].to_plotly_json(),
+        "legend": {"tracegroupgap": 0},
+        "margin": {"t": 0, "b": 0, "l": 0, "r": 20},
+    }
+
+
+def get_treemap(df, path=["type", "policy_options"], length=20):
+    df = df.assign(policy_options=policy_labels(df, length))
+
     fig = px.treemap(
         df,
         path=path,
@@ -43,3 +53,125 @@ def get_treemap(df, path=["type", "policy_options"], length=20):
     fig.update_layout(margin=dict(t=0, b=0, l=0, r=20))
 
     return fig
+
+
+def get_treemap_dict(df, path=["type", "policy_options"], length=20, values="cost"):
+    """
+        Builds the same treemap as get_treemap as a plain figure dict.
+
+    The ids/labels/parents/values arrays are built directly with one groupby
+    sum per level of the path, in the order plotly express would produce them,
+    skipping px's generic hierarchy handling and figure validation.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Policies to plot, with the path columns, flag, option and values column.
+    path: list of str
+        Columns from the root to the leaves of the treemap.
+    length: int
+        Maximum line length of the wrapped policy labels.
+    values: str
+        Column holding the size of each leaf.
+    """
+    # only the columns the treemap needs, the caller's frame is left as is
+    df = df[path + [values]].assign(policy_options=policy_labels(df, length, values))
+
+    # same as px, from the leaves up to the root
+    levels = path[::-1]
+    ids, labels, parents, sizes = [], [], [], []
+    for i, level in enumerate(levels):
+        grouped = df.groupby(levels[i:])[values].sum()
+        keys = grouped.index.to_frame(index=False).astype(str)
+
+        ancestors = [keys[column] for column in levels[i + 1 :][::-1]]
+        if ancestors:
+            parent = reduce(lambda left, right: left + "/" + right, ancestors)
+            node_ids = parent + "/" + keys[level]
+            parents += parent.tolist()
+        else:
+            node_ids = keys[level]
+            parents += [""] * len(keys)
+
+        ids += node_ids.tolist()
+        labels += keys[level].tolist()
+        sizes += grouped.tolist()
+
+    return {
+        "data": [
+            {
+                "type": "treemap",
+                "branchvalues": "total",
+                "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+                "hovertemplate": f"labels=%{{label}}<br>{values}=%{{value}}<br>parent=%{{parent}}<br>id=%{{id}}<extra></extra>",
+                "ids": ids,
+                "labels": labels,
+                "name": "",
+                "parents": parents,
+                "values": sizes,
+            }
+        ],
+        "layout": _treemap_layout(),
+    }
+
+
+def get_package_treemap_dict(df, root_label, length=20, values="cost", ids="id"):
+    """
+        Two level treemap of a package, root -> policies, as a plain figure dict.
+
+    Leaves keep the order of df. Unlike get_treemap_dict the ids don't contain
+    any labels (the root is "total" and each leaf its policy id), so a change
+    of cost only touches a few values/labels, see package_treemap_patch.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Selected policies with the policy_options, flag, option and values columns.
+    root_label: str
+        Label of the root tile, e.g. "Total (€12.3mn)".
+    """
+    leaf_values = df[values].fillna(0).tolist()
+
+    return {
+        "data": [
+            {
+                "type": "treemap",
+                "branchvalues": "total",
+                "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+                "hovertemplate": f"labels=%{{label}}<br>{values}=%{{value}}<extra></extra>",
+                "ids": [PACKAGE_ROOT_ID] + df[ids].tolist(),
+                "labels": [root_label] + policy_labels(df, length, values).tolist(),
+                "name": "",
+                "parents": [""] + [PACKAGE_ROOT_ID] * len(df),
+                # summed in leaf order so the root is never less than its leaves
+                "values": [sum(leaf_values)] + leaf_values,
+            }
+        ],
+        "layout": _treemap_layout(),
+    }
+
+
+def package_treemap_patch(position, leaf, root_value, root_label, length=20):
+    """
+        Partial update of a get_package_treemap_dict figure after the cost of
+    one of its policies changed.
+
+    Parameters
+    ----------
+    position: int
+        Position of the policy among the leaves of the treemap.
+    leaf: pd.DataFrame
+        Single row frame with the policy's policy_options, flag, option and cost.
+    root_value: float
+        New sum of all the leaves.
+    root_label: str
+        New label of the root tile.
+    """
+    fig = Patch()
+    trace = fig["data"][0]
+    trace["values"][0] = root_value
+    trace["labels"][0] = root_label
+    trace["values"][position + 1] = float(leaf["cost"].fillna(0).iloc[0])
+    trace["labels"][position + 1] = policy_labels(leaf, length).iloc[0]
+
+    return fig
@@ -0,0 +1,166 @@
+import base64
+import logging
+
+import numpy as np
+import pandas as pd
+
+from layouts.functions.catalog import OPTION_LEVELS, option_codes
+
+ENCODING_VERSION = "v1"
+MEDIUM_CODE = OPTION_LEVELS.index("medium")
+
+
+class PackageEncodingError(ValueError):
+    pass
+
+
+def is_encoded_package(data):
+    return isinstance(data, str) and data.startswith(f"{ENCODING_VERSION}.")
+
+
+def encode_package(catalog, policy_ids, options):
+    """
+        Compact, versioned encoding of a package.
+
+    A bitmask of the selected catalog rows followed by a 2-bit option code
+    for every scalable policy in the catalog, base64'd and prefixed with the
+    encoding version and the catalog's encoding signature, e.g. "v1.3f2a9c1e.<data>".
+
+    Parameters
+    ----------
+    catalog: PolicyCatalog
+        Catalog the package is encoded against.
+    policy_ids: list of str
+        Ids of the selected policies.
+    options: list of str
+        Chosen cost level of each selected policy.
+    """
+    rows = catalog.rows(policy_ids)
+    codes = option_codes(options)
+    known = rows >= 0
+
+    selected = np.zeros(len(catalog), dtype=bool)
+    selected[rows[known]] = True
+
+    all_codes = np.full(len(catalog), MEDIUM_CODE, dtype=np.uint8)
+    all_codes[rows[known]] = np.where(codes[known] >= 0, codes[known], MEDIUM_CODE)
+
+    # four 2-bit codes per byte
+    scalable_codes = all_codes[catalog.scalable]
+    padded = np.zeros(-(-len(scalable_codes) // 4) * 4, dtype=np.uint8)
+    padded[: len(scalable_codes)] = scalable_codes
+    packed_codes = (
+        (padded[0::4] << 6) | (padded[1::4] << 4) | (padded[2::4] << 2) | padded[3::4]
+    )
+
+    payload = np.packbits(selected).tobytes() + packed_codes.tobytes()
+    data = base64.urlsafe_b64encode(payload).decode("ascii")
+
+    return f"{ENCODING_VERSION}.{catalog.encoding_signature}.{data}"
+
+
+def decode_packages(catalog, encoded_packages):
+    """
+        Reverses encode_package for a batch of packages at once.
+
+    Raises a PackageEncodingError if any package is malformed, was encoded
+    with another version or against a catalog with different policies (or
+    scalable flags).
+
+    Returns
+    -------
+    selected: np.ndarray
+        n_packages x n_policies boolean matrix of the selected catalog rows.
+    codes: np.ndarray
+        n_packages x n_policies matrix of the chosen option code of every
+        catalog row (medium for fixed policies).
+    """
+    n_mask_bytes = -(-len(catalog) // 8)
+    n_scalable = int(catalog.scalable.sum())
+    n_bytes = n_mask_bytes + -(-n_scalable // 4)
+
+    payloads = np.empty((len(encoded_packages), n_bytes), dtype=np.uint8)
+    for i, encoded in enumerate(encoded_packages):
+        try:
+            version, signature, data = encoded.split(".")
+        except (AttributeError, ValueError):
+            raise PackageEncodingError(
+                f"Malformed package encoding: {str(encoded)[:20]}"
+            )
+
+        if version != ENCODING_VERSION:
+            raise PackageEncodingError(
+                f"Unsupported package encoding version: {version}"
+            )
+
+        if signature != catalog.encoding_signature:
+            raise PackageEncodingError(
+                "Package was encoded against a different catalog"
+            )
+
+        try:
+            payload = base64.urlsafe_b64decode(data)
+        except ValueError:
+            raise PackageEncodingError(f"Malformed package encoding: {encoded[:20]}")
+
+        # urlsafe_b64decode ignores anything after the padding, so also
+        # require data to be the canonical encoding of the payload
+        if (
+            len(payload) != n_bytes
+            or base64.urlsafe_b64encode(payload).decode("ascii") != data
+        ):
+            raise PackageEncodingError(f"Malformed package encoding: {encoded[:20]}")
+
+        payloads[i] = np.frombuffer(payload, dtype=np.uint8)
+
+    selected = np.unpackbits(payloads[:, :n_mask_bytes], axis=1)[:, : len(catalog)]
+
+    packed_codes = payloads[:, n_mask_bytes:]
+    scalable_codes = np.stack(
+        [
+            (packed_codes >> 6) & 3,
+            (packed_codes >> 4) & 3,
+            (packed_codes >> 2) & 3,
+            packed_codes & 3,
+        ],
+        axis=2,
+    ).reshape(len(payloads), 4 * packed_codes.shape[1])
+
+    codes = np.full((len(payloads), len(catalog)), MEDIUM_CODE, dtype=np.uint8)
+    codes[:, catalog.scalable] = scalable_codes[:, :n_scalable]
+
+    return selected.astype(bool), codes
+
+
+def decode_package(catalog, encoded):
+    """
+        Reverses encode_package, returning the selected catalog rows and
+    their chosen options.
+
+    Raises a PackageEncodingError if the package was encoded with another
+    version or against a catalog with different policies.
+    """
+    selected, codes = decode_packages(catalog, [encoded])
+
+    rows = np.flatnonzero(selected[0])
+    options = np.array(OPTION_LEVELS, dtype=object)[codes[0, rows]].tolist()
+
+    return rows, options
+
+
+def package_frame(catalog, data):
+    """
+        Selected policies of a stored package as a frame of catalog rows
+    with on_off, option and cost columns.
+
+    Accepts both encoded packages and the older list of records format.
+    """
+    if is_encoded_package(data):
+        rows, options = decode_package(catalog, data)
+        package_df = catalog.selection(rows, options)
+        package_df["cost"] = catalog.option_costs(rows, options)
+        return package_df
+
+    # records saved before the encoding was introduced
+    logging.info("--- Loading package stored as records ---")
+    return pd.DataFrame(data)
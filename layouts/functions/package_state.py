@@ -0,0 +1,58 @@
+class PackageState:
+    """
+        Policies checked in the Programme Builder with their chosen option.
+
+    Kept in package-state-store between requests only to detect which change
+    led to a package, so the treemap can be patched rather than redrawn when
+    the option of an already selected policy changes. The state itself is
+    always rebuilt from the checkbox and dropdown values of the request.
+
+    Parameters
+    ----------
+    catalog_signature: str
+        Signature of the catalog the policies were looked up in.
+    selected: dict
+        id -> option of the checked policies, in the order they are rendered.
+    """
+
+    def __init__(self, catalog_signature, selected=None):
+        self.catalog_signature = catalog_signature
+        self.selected = selected if selected is not None else {}
+
+    @classmethod
+    def from_inputs(cls, catalog, policy_options_checked, policy_ids, scalable_options):
+        """Builds the state from every checkbox and dropdown value"""
+        selected = {
+            policy_id["index"]: option if option is not None else "medium"
+            for checked, policy_id, option in zip(
+                policy_options_checked, policy_ids, scalable_options
+            )
+            if checked and policy_id["index"] in catalog.index
+        }
+        return cls(catalog.signature, selected)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {
+            "catalog_signature": self.catalog_signature,
+            "selected": self.selected,
+        }
+
+    def is_option_change(self, previous, policy_id):
+        """
+            Whether this state only differs from previous by the option of
+        policy_id, selected in both.
+        """
+        if (
+            previous.catalog_signature != self.catalog_signature
+            or policy_id not in self.selected
+            or policy_id not in previous.selected
+        ):
+            return False
+
+        return {**previous.selected, policy_id: self.selected[policy_id]} == (
+            self.selected
+        )
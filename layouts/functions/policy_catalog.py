@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+
+from layouts.functions.catalog import PolicyCatalog, compact_catalog
+from layouts.functions.prep_data import data_version, import_data
+
+CATALOG_FILENAME = "policy_costs_scalable.csv"
+
+
+def load_catalog(filename=CATALOG_FILENAME):
+    """
+        Reads, normalises and compacts the policy cost catalog.
+
+    Parameters
+    ----------
+    filename: str
+        Catalog file to read with import_data.
+    """
+    df = import_data(filename)
+    df["cost"] = df["medium"]
+    df["id"] = df["policy_options"].str.lower().str.replace(" ", "-")
+    df["flag"] = df["flag"].str.strip(" ")
+
+    return PolicyCatalog(compact_catalog(df))
+
+
+class CatalogProvider:
+    """
+        Serves the policy cost catalog, reloading it when its source changes.
+
+    The source's version (see data_version) is checked at most once every
+    check_interval seconds, from whichever request comes first. A changed
+    catalog is built in full before being swapped in, so callers always get a
+    complete catalog, and the on_reload listeners are then called to drop
+    anything cached from the old one.
+
+    Parameters
+    ----------
+    filename: str
+        Catalog file to read with import_data.
+    check_interval: float
+        Minimum number of seconds between version checks.
+    """
+
+    def __init__(self, filename=CATALOG_FILENAME, check_interval=10):
+        self.filename = filename
+        self.check_interval = check_interval
+        self._listeners = []
+        self._lock = threading.Lock()
+
+        self._version = data_version(filename)
+        self._catalog = load_catalog(filename)
+        self._checked_at = time.monotonic()
+
+    def get(self):
+        """The current catalog"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh()
+
+        return self._catalog
+
+    def on_reload(self, listener):
+        """Registers listener(catalog) to be called after a new catalog is swapped in"""
+        self._listeners.append(listener)
+
+    def refresh(self):
+        # requests arriving during a check keep using the current catalog
+        if not self._lock.acquire(blocking=False):
+            return
+
+        try:
+            self._checked_at = time.monotonic()
+            version = data_version(self.filename)
+            if version == self._version:
+                return
+
+            logging.info(f"--- Reloading {self.filename} ({version}) ---")
+            catalog = load_catalog(self.filename)
+            self._catalog, self._version = catalog, version
+
+            for listener in self._listeners:
+                listener(catalog)
+
+        except Exception as e:
+            logging.warning(f"Could not reload {self.filename}: {e}")
+
+        finally:
+            self._lock.release()
+
+
+# shared by the pages and components that need the catalog, call get() per request
+catalog_provider = CatalogProvider()
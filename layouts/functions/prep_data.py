@@ -3,10 +3,60 @@ import logging
 import json
 import boto3
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
+from functools import lru_cache
 from app import conf
 from ten_ds_utils.filesystem.s3 import S3Path, CLEAN_BUCKET
 
+# concurrent requests when reading a batch of files
+FETCH_WORKERS = 16
+
+
+@lru_cache(maxsize=None)
+def s3_client():
+    """
+        s3 client shared by this process (boto3 clients are thread-safe).
+
+    Dropped in forked children, e.g. gunicorn workers of a preloaded app, which
+    create their own on first use rather than sharing the parent's connections.
+    """
+    return boto3.client("s3")
+
+
+def _after_fork():
+    boto3.DEFAULT_SESSION = None
+    s3_client.cache_clear()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def filesystem():
+    """conf.filesystem(), reusing the process' s3 client"""
+    if conf.use_s3_filesystem():
+        return conf.filesystem(client=s3_client())
+
+    return conf.filesystem()
+
+
+def data_path(filename, fs):
+    """
+        conf.generate_path, on an existing filesystem rather than a new one
+    (and a new s3 client) for every path.
+    """
+    key = os.path.join(conf.data_path(), filename) if conf.data_path() else filename
+    return fs.path(conf.data_bucket(), key)
+
+
+def _map_concurrently(function, items):
+    """function applied to every item on a bounded thread pool, in order"""
+    if len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(items))) as pool:
+        return list(pool.map(function, items))
+
 
 def import_data(filename, **kwargs):
     """
@@ -20,12 +70,30 @@ def import_data(filename, **kwargs):
         Additional keyword arguments to pass onto underlying read_file method.
     """
 
-    fs = conf.filesystem()
+    fs = filesystem()
     df_path = conf.generate_path(filename)
 
     return fs.read_file(df_path, **kwargs)
 
 
+def import_many(filenames, **kwargs):
+    """
+        Reads several files from local/s3 concurrently, over the process' s3
+    client, so a batch of reads takes about as long as the slowest one.
+
+    Parameters
+    ----------
+    filenames: list of str
+        Filenames of the objects to read in, returned in the same order.
+    **kwargs:
+        Additional keyword arguments to pass onto underlying read_file method.
+    """
+    fs = filesystem()
+    paths = [data_path(filename, fs) for filename in filenames]
+
+    return _map_concurrently(lambda path: fs.read_file(path, **kwargs), paths)
+
+
 def save_graph_to_pickle_jar(object_to_be_pickled, filename):
     """
         Uploads and stores an object from a 10ds-dash app to s3 in
@@ -43,13 +111,13 @@ def save_graph_to_pickle_jar(object_to_be_pickled, filename):
         if not filename.endswith(".pkl"):
             filename += ".pkl"
 
-        fs = conf.filesystem()
+        fs = filesystem()
         s3_path = S3Path(conf.data_bucket(), f"pickle-jar/{conf.app_name()}/{filename}")
         fs.upload_pickle(s3_path, object_to_be_pickled)
 
 
 def write_file(df, file_name: str):
-    fs = conf.filesystem()
+    fs = filesystem()
     path = conf.generate_path(file_name)
     fs.upload_df(path, df)
 
@@ -74,12 +142,38 @@ def json_from_s3(file_name="data.json"):
             data = json.load(f)
     else:
         df_path = conf.generate_path(file_name)
-        fs = conf.filesystem()
+        fs = filesystem()
         data = fs.read_file(df_path)
 
     return data
 
 
+def data_version(filename, fs=None):
+    """
+        Cheap version marker of a data file, without reading it: its
+    modification time locally and its ETag on s3.
+
+    Parameters
+    ----------
+    filename: str
+        Filename of the object, as passed to import_data.
+    fs: Filesystem, optional
+        Filesystem to build the path with, a new one by default.
+    """
+    path = data_path(filename, fs or filesystem())
+
+    if conf.use_s3_filesystem():
+        return s3_client().head_object(Bucket=path.bucket, Key=path.key)["ETag"]
+
+    return str(os.path.getmtime(path.str))
+
+
+def data_versions(filenames):
+    """data_version of several files, looked up concurrently"""
+    fs = filesystem()
+    return _map_concurrently(lambda filename: data_version(filename, fs), filenames)
+
+
 def get_saved_scorecards_metadata():
     saved_scorecards = []
     # loop over all files
@@ -124,19 +218,6 @@ def get_saved_scorecards_metadata():
     return saved_scorecards
 
 
-def calculate_percentage_costs(df, polic_lens="lens_1"):
-    total_cost = df["cost"].sum()
-    percentage_costs = {}
-    for category in df[polic_lens].unique():
-        cost_category = df[df[polic_lens] == category]["cost"].sum()
-        percentage_costs[category] = {
-            "%": round(cost_category / total_cost * 100),
-            "€": round(cost_category, 1),
-        }
-
-    return percentage_costs
-
-
 def move_metadata_to_archive(file_path, target_path):
     if conf.is_local():
         os.makedirs(
@@ -148,7 +229,7 @@ def move_metadata_to_archive(file_path, target_path):
 
     else:
         bucket = conf.data_bucket()
-        client = boto3.client("s3")
+        client = s3_client()
         copy_source = {"Bucket": bucket, "Key": f"{conf.data_path()}/{file_path}"}
         client.copy_object(
             Bucket=conf.data_bucket(),
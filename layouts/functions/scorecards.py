@@ -0,0 +1,203 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from layouts.functions.aggregation import category_costs
+from layouts.functions.cache import FigureCache
+from layouts.functions.catalog import LENSES
+from layouts.functions.prep_data import data_versions, import_many
+
+# package x lens_1 x lens_2 x policy dimensions of the checkout cube, and the
+# policies' cost level and flag the treemap labels need
+CUBE_DIMENSIONS = ["package", "package_with_cost", "lens_1", "lens_2", "policy_options"]
+CUBE_COLUMNS = CUBE_DIMENSIONS + ["flag", "option", "cost"]
+
+# costed scorecards and their partial aggregates, by filename and file version
+_packages_cache = FigureCache(maxsize=64)
+# cubes of recent selections, by the filenames and file versions selected
+_selections_cache = FigureCache(maxsize=16)
+# file versions of recent selections and when they were checked, by filenames,
+# rechecked at most once every VERSION_CHECK_INTERVAL seconds like the catalog
+VERSION_CHECK_INTERVAL = 10
+_versions_cache = FigureCache(maxsize=16)
+# one load or version check of a selection, however many callbacks ask for it
+# at once, without holding up other selections
+_selection_locks = {}
+_selection_locks_guard = threading.Lock()
+
+
+def _selection_lock(key):
+    with _selection_locks_guard:
+        return _selection_locks.setdefault(key, threading.Lock())
+
+
+def scorecard_package(catalog, saved_df, metadata_dict):
+    """
+        Policies of a saved scorecard that are still in the catalog, costed
+    at today's prices and labelled with the package's name and total.
+    """
+    # costs of policies have changed over time so we only need whether the choice was Low, Medium or High
+    # take only options that are still in play
+    rows = catalog.rows(saved_df["id"].tolist())
+    known = rows >= 0
+    options = saved_df["option"].to_numpy()[known]
+    package_df = catalog.selection(rows[known], options)
+
+    package_df["cost"] = catalog.option_costs(rows[known], options)
+    package_df = package_df.dropna(subset=["lens_1", "lens_2"])
+
+    # add package name to dataframe
+    package_total = round(package_df["cost"].sum(), 1)
+    package_df["package"] = f"{metadata_dict['name']}"
+    package_df["package_with_cost"] = f"{metadata_dict['name']} (€{package_total}mn)"
+
+    return package_df
+
+
+class ScorecardPackage:
+    """
+        A saved scorecard costed against the catalog, with its partial
+    aggregates: the cost of each of its policies (df), its total and its
+    spend in every category of each lens.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.name = df["package_with_cost"].iloc[0] if len(df) else None
+        self.total = np.nansum(df["cost"].to_numpy(dtype=np.float64))
+        self.lens_costs = category_costs(df, LENSES)
+
+
+class ScorecardSelection:
+    """
+        The saved scorecards selected in the checkout, combined from their
+    partial aggregates.
+
+    Built once per selection, with the cost of every policy of every
+    package along the package x lens_1 x lens_2 x policy dimensions (the
+    cube), so each "Group by" view is a projection of it rather than a
+    reload and regroup of the packages.
+
+    Parameters
+    ----------
+    packages: list of ScorecardPackage
+        Selected packages, in the order they were selected.
+    key: tuple
+        Filenames and file versions of the selected packages.
+    """
+
+    def __init__(self, packages, key=()):
+        self.packages = packages
+        self.key = key
+        self._cube = pd.concat(
+            [package.df[CUBE_COLUMNS] for package in packages], ignore_index=True
+        )
+
+    def cube(self):
+        """Cost of every policy of every selected package, free to modify"""
+        return self._cube.copy()
+
+    def group_costs(self, groupby_value):
+        """
+            Total cost of each lens category ("lens_1", "lens_2") or package
+        ("package_with_cost") of the selection, folded from the packages'
+        aggregates rather than their policies.
+        """
+        if groupby_value in LENSES:
+            costs = pd.concat(
+                [package.lens_costs[groupby_value] for package in self.packages]
+            )
+        else:
+            costs = pd.Series(
+                [package.total for package in self.packages if package.name],
+                index=[package.name for package in self.packages if package.name],
+            )
+
+        costs = costs.groupby(level=0, sort=True).sum()
+        costs.index.name = groupby_value
+
+        return costs.rename("cost")
+
+
+def load_scorecards(catalog, filenames):
+    """
+        Saved scorecards selected in the checkout.
+
+    Each scorecard is costed once per version of its file (see data_version)
+    and kept with its partial aggregates, so adding a package to the
+    selection only reads and costs that package, removing one reads nothing,
+    and the checkout graph and tables share every read. The versions of all
+    the selected files are checked in one concurrent batch of requests, at
+    most once every VERSION_CHECK_INTERVAL seconds for the same files, so
+    switching the grouping doesn't check them again.
+
+    Parameters
+    ----------
+    catalog: PolicyCatalog
+        Catalog to cost the packages with.
+    filenames: list of str
+        Filenames of the saved scorecards, without folder or extension.
+    """
+    keys = _file_versions(catalog, filenames)
+    selection_key = tuple(keys)
+
+    try:
+        with _selection_lock(selection_key):
+            selection = _selections_cache.get(selection_key, catalog.signature)
+            if selection is None:
+                selection = _load_selection(catalog, keys)
+                _selections_cache.set(selection_key, catalog.signature, selection)
+    finally:
+        # later loads of the selection find it in the cache
+        with _selection_locks_guard:
+            _selection_locks.pop(selection_key, None)
+
+    return selection
+
+
+def _file_versions(catalog, filenames):
+    """(filename, version) of each selected file, see load_scorecards"""
+    filenames_key = tuple(filenames)
+    try:
+        with _selection_lock(filenames_key):
+            checked = _versions_cache.get(filenames_key, catalog.signature)
+            if (
+                checked is None
+                or time.monotonic() - checked[0] >= VERSION_CHECK_INTERVAL
+            ):
+                csv_files = [
+                    f"saved_scorecards/{filename}.csv" for filename in filenames
+                ]
+                checked = (
+                    time.monotonic(),
+                    list(zip(filenames, data_versions(csv_files))),
+                )
+                _versions_cache.set(filenames_key, catalog.signature, checked)
+    finally:
+        with _selection_locks_guard:
+            _selection_locks.pop(filenames_key, None)
+
+    return checked[1]
+
+
+def _load_selection(catalog, keys):
+    packages = {key: _packages_cache.get(key, catalog.signature) for key in keys}
+    missing = [key for key, package in packages.items() if package is None]
+
+    if missing:
+        # the new scorecards and their metadata in one concurrent batch of reads
+        files = import_many(
+            [f"saved_scorecards/{filename}.csv" for filename, _ in missing]
+            + [f"saved_scorecards/metadata/{filename}.json" for filename, _ in missing]
+        )
+        for key, saved_df, metadata_dict in zip(
+            missing, files[: len(missing)], files[len(missing) :]
+        ):
+            packages[key] = ScorecardPackage(
+                scorecard_package(catalog, saved_df, metadata_dict)
+            )
+            _packages_cache.set(key, catalog.signature, packages[key])
+
+    return ScorecardSelection([packages[key] for key in keys], tuple(keys))
@@ -0,0 +1,167 @@
+import math
+
+import numpy as np
+
+from layouts.functions.catalog import OPTION_LEVELS
+
+MANDATORY_CATEGORY = "Mandatory Activities"
+# budget steps of the dynamic programme, costs are rounded up to budget / MAX_STEPS
+MAX_STEPS = 20_000
+
+
+class InfeasiblePackageError(ValueError):
+    pass
+
+
+def _boolean_convolve(left, right, size):
+    """Spends reachable as a sum of one spend reachable in each of left and right"""
+    n = 1 << (len(left) + len(right) - 1).bit_length()
+    counts = np.fft.irfft(np.fft.rfft(left, n) * np.fft.rfft(right, n), n)
+
+    return counts[:size] > 0.5
+
+
+def _category_spends(items, size):
+    """
+        Spends (in budget steps) reachable with the items of one category.
+
+    Returns the reachable spends and, for each item, the option code picked to
+    reach each spend (-1 where the item was left out).
+    """
+    reach = np.zeros(size, dtype=bool)
+    reach[0] = True
+    choices = []
+    for levels, mandatory in items:
+        new_reach = np.zeros(size, dtype=bool) if mandatory else reach.copy()
+        choice = np.full(size, -1, dtype=np.int8)
+        for code, steps in levels:
+            if steps >= size:
+                continue
+
+            shifted = np.zeros(size, dtype=bool)
+            shifted[steps:] = reach[: size - steps]
+            choice[shifted & ~new_reach] = code
+            new_reach |= shifted
+
+        choices.append(choice)
+        reach = new_reach
+
+    return reach, choices
+
+
+def suggest_package(catalog, budget, lens="lens_1", min_shares=None):
+    """
+        Package spending as much of the budget as possible.
+
+    Mandatory policies (default, or in the Mandatory Activities category) are
+    always in the package, awaiting policies never are, and each scalable
+    policy is costed at one of its levels. Solved exactly, up to costs being
+    rounded up to budget / MAX_STEPS, with a dynamic programme over the budget
+    for each category of the lens, combined by convolution.
+
+    Raises an InfeasiblePackageError if the mandatory policies and minimum
+    shares can't fit in the budget.
+
+    Parameters
+    ----------
+    catalog: PolicyCatalog
+        Catalog to pick the policies from.
+    budget: float
+        Budget ceiling in €mn.
+    lens: str
+        Lens the minimum shares are given for.
+    min_shares: dict, optional
+        Minimum share of the budget to spend on categories of the lens,
+        e.g. {"EOP": 0.2}.
+
+    Returns
+    -------
+    rows: np.ndarray
+        Catalog rows of the suggested policies.
+    options: list of str
+        Chosen cost level of each suggested policy.
+    """
+    if budget is None or budget <= 0:
+        raise InfeasiblePackageError("The budget must be positive")
+
+    min_shares = min_shares or {}
+    step = budget / MAX_STEPS
+    size = MAX_STEPS + 1
+
+    flags = catalog.df["flag"].to_numpy()
+    lens_codes = catalog.lens_codes[lens]
+    mandatory = (
+        catalog.default | (catalog.df["lens_1"] == MANDATORY_CATEGORY).to_numpy()
+    )
+
+    # items of each category: their (option code, cost in steps) and whether they're mandatory
+    items = {}
+    for row in np.flatnonzero(flags != "awaiting"):
+        if catalog.scalable[row]:
+            codes = range(len(OPTION_LEVELS))
+        else:
+            codes = [OPTION_LEVELS.index("medium")]
+
+        levels = [
+            (code, math.ceil(catalog.costs[row, code] / step - 1e-9))
+            for code in codes
+            if not np.isnan(catalog.costs[row, code])
+        ]
+        if not levels:
+            if not mandatory[row]:
+                continue
+            # mandatory but not costed yet (TBC)
+            levels = [(OPTION_LEVELS.index("medium"), 0)]
+
+        items.setdefault(lens_codes[row], []).append((row, levels, mandatory[row]))
+
+    present = {catalog.lens_labels[lens][code] for code in items if code >= 0}
+    for category, share in min_shares.items():
+        if share > 0 and category not in present:
+            raise InfeasiblePackageError(f"No policies can be picked in {category}")
+
+    # reachable spends of each category, then of the categories so far
+    nothing = np.zeros(size, dtype=bool)
+    nothing[0] = True
+    totals = [nothing]
+    categories = []
+    for code, category_items in items.items():
+        reach, choices = _category_spends(
+            [(levels, is_mandatory) for _, levels, is_mandatory in category_items], size
+        )
+        category = catalog.lens_labels[lens][code] if code >= 0 else None
+        min_steps = math.floor(min_shares.get(category, 0) * budget / step + 1e-9)
+        reach[:min_steps] = False
+
+        categories.append((category_items, reach, choices))
+        totals.append(_boolean_convolve(totals[-1], reach, size))
+
+    reachable = np.flatnonzero(totals[-1])
+    if len(reachable) == 0:
+        raise InfeasiblePackageError(
+            "The mandatory policies and minimum shares don't fit in the budget"
+        )
+
+    # walk back through the categories, then their items, from the largest spend
+    spend = reachable[-1]
+    rows, options = [], []
+    for (category_items, reach, choices), previous in zip(
+        reversed(categories), reversed(totals[:-1])
+    ):
+        spends = np.arange(spend + 1)
+        category_spend = spends[reach[: spend + 1] & previous[spend - spends]][-1]
+        spend -= category_spend
+
+        for (row, levels, _), choice in zip(
+            reversed(category_items), reversed(choices)
+        ):
+            code = choice[category_spend]
+            if code < 0:
+                continue
+
+            rows.append(row)
+            options.append(OPTION_LEVELS[code])
+            category_spend -= dict(levels)[code]
+
+    order = np.argsort(rows)
+    return np.asarray(rows, dtype=np.intp)[order], [options[i] for i in order]
@@ -0,0 +1,93 @@
+import numpy as np
+
+PERCENTILES = [10, 50, 90]
+
+
+def cost_ranges(catalog, rows, options):
+    """
+        Lowest, chosen and highest cost of each policy of a package.
+
+    Scalable policies range over their offered very-low..high levels,
+    fixed policies (and uncosted levels) don't vary.
+    """
+    chosen = np.nan_to_num(catalog.option_costs(rows, options))
+    offered = catalog.costs[rows]
+    scalable = catalog.scalable[rows] & ~np.isnan(offered).all(axis=1)
+
+    low, high = chosen.copy(), chosen.copy()
+    low[scalable] = np.nanmin(offered[scalable], axis=1)
+    high[scalable] = np.nanmax(offered[scalable], axis=1)
+
+    return np.minimum(low, chosen), chosen, np.maximum(high, chosen)
+
+
+def simulate_package_costs(catalog, rows, options, n_draws=10_000, seed=0):
+    """
+        Draws of the cost of each policy of a package.
+
+    Each scalable policy's cost follows a triangular distribution over its
+    offered levels, peaking at the chosen one.
+
+    Returns an n_draws x n_policies array.
+    """
+    low, mode, high = cost_ranges(catalog, rows, options)
+    draws = np.broadcast_to(mode, (n_draws, len(mode))).copy()
+
+    varies = high > low
+    if varies.any():
+        rng = np.random.default_rng(seed)
+        draws[:, varies] = rng.triangular(
+            low[varies], mode[varies], high[varies], size=(n_draws, varies.sum())
+        )
+
+    return draws
+
+
+def package_cost_percentiles(
+    catalog, rows, options, lens="lens_1", n_draws=10_000, seed=0
+):
+    """
+        P10/P50/P90 of the total cost of a package and of its spend in each
+    category of a lens.
+
+    Parameters
+    ----------
+    catalog: PolicyCatalog
+        Catalog the package's policies are in.
+    rows: np.ndarray
+        Catalog rows of the package's policies.
+    options: list of str
+        Chosen cost level of each policy.
+    lens: str
+        Lens to split the spend by.
+    n_draws: int
+        Number of simulated packages.
+    seed: int
+        Seed of the draws, so a package always gets the same percentiles.
+
+    Returns
+    -------
+    dict
+        {"total": {"p10": x, "p50": y, "p90": z}, "categories": {category: {...}}}
+    """
+    draws = simulate_package_costs(catalog, rows, options, n_draws, seed)
+
+    # category spend of every draw, as one product with a policy x category indicator
+    codes = catalog.lens_codes[lens][rows]
+    categories = np.unique(codes[codes >= 0])
+    indicator = (codes[:, None] == categories[None, :]).astype(draws.dtype)
+    category_draws = draws @ indicator
+
+    def percentiles(values):
+        return {
+            f"p{q}": round(float(value), 1)
+            for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+        }
+
+    return {
+        "total": percentiles(draws.sum(axis=1)),
+        "categories": {
+            catalog.lens_labels[lens][code]: percentiles(category_draws[:, i])
+            for i, code in enumerate(categories)
+        },
+    }
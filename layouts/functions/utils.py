@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 def get_username(href):
     try:
         return href.split("username=")[-1]
@@ -6,6 +9,53 @@ def get_username(href):
         return "Unknown user"
 
 
+def _wrap(text, length):
+    words = text.split()
+    lines = []
+    line = ""
+
+    for word in words:
+        if len(line) + len(word) + 1 <= length:
+            line = f"{line} {word}" if line else word
+        else:
+            lines.append(line)
+            line = word
+
+    lines.append(line)
+
+    return "<br>".join(lines)
+
+
+# wrapped names of every policy in the current catalog, however many there are
+_catalog_labels = {}
+
+
+def cache_labels(names, lengths):
+    """
+        Wraps every policy name of a catalog once, for each line length,
+    replacing the names of the previous catalog.
+    """
+    global _catalog_labels
+    _catalog_labels = {
+        (name, length): _wrap(name, length) for name in names for length in lengths
+    }
+
+
+@lru_cache(maxsize=8192)
+def _wrap_other(text, length):
+    return _wrap(text, length)
+
+
+def wrap_label(text, length):
+    """Wraps text onto lines of at most length characters, joined with <br>"""
+    label = _catalog_labels.get((text, length))
+    if label is None:
+        # e.g. names suffixed with their package in the checkout
+        label = _wrap_other(text, length)
+
+    return label
+
+
 lens_1_categories = [
     "Mandatory Activities",
     "EOP",
@@ -27,4 +77,3 @@ lens_2_categories = [
     "Space Science",
     "Space Exploration and Human Spaceflight",
 ]
-
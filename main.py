@@ -15,6 +15,9 @@ import layouts.dashboard
 import layouts.transport_map.full_map
 import layouts.checkout
 
+# batch package evaluation for scripted what-if sweeps
+import layouts.api
+
 logging.info("Setting main layout")
 
 # main layout of the index page